@@ -1,9 +1,8 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
 import warnings
+from headless import enable_headless, is_headless
+from plotting import stacked_bars
 warnings.filterwarnings('ignore')
 
 class AvironsFinanceAnalyzer:
@@ -436,8 +435,13 @@ class AvironsFinanceAnalyzer:
                 df.loc[i, 'Investissement_Agriculture'] *= 1.12
                 df.loc[i, 'Investissement_Social'] *= 1.18
     
-    def create_financial_analysis(self, df):
+    def create_financial_analysis(self, df, show=None):
         """Crée une analyse complète des finances communales"""
+        # Import au premier rendu : la génération et l'export CSV n'ont pas besoin de matplotlib
+        import matplotlib.pyplot as plt
+
+        if show is None:
+            show = not is_headless()
         plt.style.use('seaborn-v0_8')
         fig = plt.figure(figsize=(20, 24))
         
@@ -477,7 +481,10 @@ class AvironsFinanceAnalyzer:
                     fontsize=16, fontweight='bold')
         plt.tight_layout()
         plt.savefig('les_avirons_financial_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if show:
+            plt.show()
+        # Libère la figure : la mémoire reste stable quand plusieurs communes tournent dans un processus
+        plt.close(fig)
         
         # Générer les insights
         self._generate_financial_insights(df)
@@ -500,14 +507,11 @@ class AvironsFinanceAnalyzer:
         years = df['Annee']
         width = 0.8
         
-        bottom = np.zeros(len(years))
         categories = ['Impots_Locaux', 'Dotations_Etat', 'Autres_Recettes']
         colors = ['#264653', '#2A9D8F', '#E76F51']
         labels = ['Impôts Locaux', 'Dotations État', 'Autres Recettes']
         
-        for i, category in enumerate(categories):
-            ax.bar(years, df[category], width, label=labels[i], bottom=bottom, color=colors[i])
-            bottom += df[category]
+        stacked_bars(ax, years, [df[category] for category in categories], labels, colors, width)
         
         ax.set_title('Structure des Recettes (M€)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Montants (M€)')
@@ -519,14 +523,11 @@ class AvironsFinanceAnalyzer:
         years = df['Annee']
         width = 0.8
         
-        bottom = np.zeros(len(years))
         categories = ['Fonctionnement', 'Investissement', 'Charge_Dette', 'Personnel']
         colors = ['#264653', '#2A9D8F', '#E76F51', '#F9A602']
         labels = ['Fonctionnement', 'Investissement', 'Charge Dette', 'Personnel']
         
-        for i, category in enumerate(categories):
-            ax.bar(years, df[category], width, label=labels[i], bottom=bottom, color=colors[i])
-            bottom += df[category]
+        stacked_bars(ax, years, [df[category] for category in categories], labels, colors, width)
         
         ax.set_title('Structure des Dépenses (M€)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Montants (M€)')
@@ -624,15 +625,12 @@ class AvironsFinanceAnalyzer:
         years = df['Annee']
         width = 0.8
         
-        bottom = np.zeros(len(years))
         categories = ['Investissement_Agriculture', 'Investissement_Environnement', 
                      'Investissement_Transport', 'Investissement_Education', 'Investissement_Social']
         colors = ['#264653', '#2A9D8F', '#E76F51', '#F9A602', '#6A0572']
         labels = ['Agriculture', 'Environnement', 'Transport', 'Éducation', 'Social']
         
-        for i, category in enumerate(categories):
-            ax.bar(years, df[category], width, label=labels[i], bottom=bottom, color=colors[i])
-            bottom += df[category]
+        stacked_bars(ax, years, [df[category] for category in categories], labels, colors, width)
         
         ax.set_title('Répartition Sectorielle des Investissements (M€)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Montants (M€)')
@@ -719,6 +717,9 @@ class AvironsFinanceAnalyzer:
 
 def main():
     """Fonction principale"""
+    if is_headless():
+        enable_headless()
+    
     print("🏛️ ANALYSE DES COMPTES COMMUNAUX DES AVIRONS (2002-2025)")
     print("=" * 60)
     
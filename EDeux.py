@@ -1,9 +1,8 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
 import warnings
+from headless import enable_headless, is_headless
+from plotting import stacked_bars
 warnings.filterwarnings('ignore')
 
 class EntreDeuxFinanceAnalyzer:
@@ -435,8 +434,13 @@ class EntreDeuxFinanceAnalyzer:
                 df.loc[i, 'Investissement_Tourisme'] *= 1.15
                 df.loc[i, 'Investissement_Culture'] *= 1.12
     
-    def create_financial_analysis(self, df):
+    def create_financial_analysis(self, df, show=None):
         """Crée une analyse complète des finances communales"""
+        # Import au premier rendu : la génération et l'export CSV n'ont pas besoin de matplotlib
+        import matplotlib.pyplot as plt
+
+        if show is None:
+            show = not is_headless()
         plt.style.use('seaborn-v0_8')
         fig = plt.figure(figsize=(20, 24))
         
@@ -476,7 +480,10 @@ class EntreDeuxFinanceAnalyzer:
                     fontsize=16, fontweight='bold')
         plt.tight_layout()
         plt.savefig('entre_deux_financial_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if show:
+            plt.show()
+        # Libère la figure : la mémoire reste stable quand plusieurs communes tournent dans un processus
+        plt.close(fig)
         
         # Générer les insights
         self._generate_financial_insights(df)
@@ -499,14 +506,11 @@ class EntreDeuxFinanceAnalyzer:
         years = df['Annee']
         width = 0.8
         
-        bottom = np.zeros(len(years))
         categories = ['Impots_Locaux', 'Dotations_Etat', 'Autres_Recettes']
         colors = ['#264653', '#2A9D8F', '#E76F51']
         labels = ['Impôts Locaux', 'Dotations État', 'Autres Recettes']
         
-        for i, category in enumerate(categories):
-            ax.bar(years, df[category], width, label=labels[i], bottom=bottom, color=colors[i])
-            bottom += df[category]
+        stacked_bars(ax, years, [df[category] for category in categories], labels, colors, width)
         
         ax.set_title('Structure des Recettes (M€)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Montants (M€)')
@@ -518,14 +522,11 @@ class EntreDeuxFinanceAnalyzer:
         years = df['Annee']
         width = 0.8
         
-        bottom = np.zeros(len(years))
         categories = ['Fonctionnement', 'Investissement', 'Charge_Dette', 'Personnel']
         colors = ['#264653', '#2A9D8F', '#E76F51', '#F9A602']
         labels = ['Fonctionnement', 'Investissement', 'Charge Dette', 'Personnel']
         
-        for i, category in enumerate(categories):
-            ax.bar(years, df[category], width, label=labels[i], bottom=bottom, color=colors[i])
-            bottom += df[category]
+        stacked_bars(ax, years, [df[category] for category in categories], labels, colors, width)
         
         ax.set_title('Structure des Dépenses (M€)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Montants (M€)')
@@ -623,15 +624,12 @@ class EntreDeuxFinanceAnalyzer:
         years = df['Annee']
         width = 0.8
         
-        bottom = np.zeros(len(years))
         categories = ['Investissement_Agriculture', 'Investissement_Tourisme', 
                      'Investissement_Environnement', 'Investissement_Culture', 'Investissement_Patrimoine']
         colors = ['#264653', '#2A9D8F', '#E76F51', '#F9A602', '#6A0572']
         labels = ['Agriculture', 'Tourisme', 'Environnement', 'Culture', 'Patrimoine']
         
-        for i, category in enumerate(categories):
-            ax.bar(years, df[category], width, label=labels[i], bottom=bottom, color=colors[i])
-            bottom += df[category]
+        stacked_bars(ax, years, [df[category] for category in categories], labels, colors, width)
         
         ax.set_title('Répartition Sectorielle des Investissements (M€)', fontsize=12, fontweight='bold')
         ax.set_ylabel('Montants (M€)')
@@ -716,6 +714,9 @@ class EntreDeuxFinanceAnalyzer:
 
 def main():
     """Fonction principale"""
+    if is_headless():
+        enable_headless()
+    
     print(f"🏛️ ANALYSE DES COMPTES COMMUNAUX DE L'ENTRE-DEUX (2002-2025)")
     print("=" * 60)
     
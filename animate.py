@@ -0,0 +1,180 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from communes import commune_entry
+from dashboard import DashboardTemplate, dashboard_title
+from headless import enable_headless
+from panel import IslandPanel
+
+ANIMATION_FORMATS = ['auto', 'mp4', 'gif', 'frames']
+
+
+def resolve_format(fmt='auto'):
+    """Format réellement utilisable : MP4 et GIF passent par ffmpeg s'il est installé, sinon images PNG"""
+    from matplotlib import animation
+
+    if fmt == 'auto':
+        fmt = 'mp4' if animation.writers.is_available('ffmpeg') else 'gif'
+    if fmt == 'mp4' and not animation.writers.is_available('ffmpeg'):
+        fmt = 'frames'
+    if fmt == 'gif' and not (animation.writers.is_available('ffmpeg') or animation.writers.is_available('pillow')):
+        fmt = 'frames'
+    return fmt
+
+
+class FrameSink:
+    """Destination des images d'une animation : vidéo, GIF ou dossier d'images PNG"""
+
+    def __init__(self, fig, path, fmt, fps=4, dpi=60):
+        from matplotlib import animation
+
+        self.fig = fig
+        self.fmt = fmt
+        self.dpi = dpi
+        self.count = 0
+        if fmt == 'frames':
+            self.path = path
+            self.writer = None
+            os.makedirs(path, exist_ok=True)
+        else:
+            self.path = f'{path}.{fmt}'
+            name = 'ffmpeg' if animation.writers.is_available('ffmpeg') else 'pillow'
+            self.writer = animation.writers[name](fps=fps)
+            self.writer.setup(fig, self.path, dpi=dpi)
+
+    def grab(self):
+        """Ajoute l'état courant de la figure comme image suivante"""
+        if self.writer is None:
+            self.fig.savefig(os.path.join(self.path, f'frame_{self.count:03d}.png'), dpi=self.dpi)
+        else:
+            self.writer.grab_frame()
+        self.count += 1
+
+    def finish(self):
+        """Finalise le fichier vidéo ou GIF"""
+        if self.writer is not None:
+            self.writer.finish()
+        return self.path
+
+
+class DashboardAnimator:
+    """Animation année par année d'un tableau de bord : une figure persistante, seules les données changent"""
+
+    def __init__(self, years, output_dir='.', fmt='auto', fps=4, dpi=60):
+        self.years = np.asarray(years)
+        self.output_dir = output_dir
+        self.fmt = resolve_format(fmt)
+        self.fps = fps
+        self.dpi = dpi
+        self.template = DashboardTemplate(self.years)
+
+    def _freeze_limits(self, df, title):
+        """Fixe les axes sur la série complète pour qu'ils ne bougent pas pendant l'animation"""
+        self.template.update(df, title)
+        for ax in list(self.template.axes.values()) + list(self.template.twins.values()):
+            ax.set_autoscale_on(False)
+
+    def _release_limits(self):
+        """Rend l'ajustement automatique des axes pour la commune suivante"""
+        for ax in list(self.template.axes.values()) + list(self.template.twins.values()):
+            ax.set_autoscale_on(True)
+
+    def animate(self, commune, df, start_year, end_year):
+        """Écrit l'animation d'une commune : les comptes se remplissent d'une année à l'autre"""
+        title = dashboard_title(commune, start_year, end_year)
+        self._freeze_limits(df, title)
+        sink = FrameSink(self.template.fig, os.path.join(self.output_dir, f'{commune_entry(commune)[3]}_animation'),
+                         self.fmt, fps=self.fps, dpi=self.dpi)
+        for year in self.years:
+            partial = df[df['Annee'] <= year]
+            self.template.update(partial, f'{title} - {year}')
+            sink.grab()
+        self._release_limits()
+        return sink.finish(), sink.count
+
+    def close(self):
+        """Libère la figure"""
+        self.template.close()
+
+
+def animate_heatmap(panel, output_dir='.', fmt='auto', fps=4, dpi=60):
+    """Animation de la carte de chaleur insulaire : les années apparaissent une à une"""
+    from island_views import IslandViews
+
+    fig = IslandViews(panel).heatmap()
+    images = [ax.images[0] for ax in fig.axes if ax.images]
+    full = [np.ma.asarray(image.get_array()) for image in images]
+    sink = FrameSink(fig, os.path.join(output_dir, 'island_heatmap_animation'), resolve_format(fmt), fps, dpi)
+    for k, year in enumerate(panel.years):
+        # Les années à venir sont masquées ; seules les données des images changent
+        hidden = np.arange(len(panel.years)) > k
+        for image, values in zip(images, full):
+            image.set_data(np.ma.masked_where(np.broadcast_to(hidden, values.shape), values))
+        fig.suptitle(f'Position des communes par rapport à la moyenne insulaire - {year}',
+                     fontsize=16, fontweight='bold')
+        sink.grab()
+    import matplotlib.pyplot as plt
+    plt.close(fig)
+    return sink.finish(), sink.count
+
+
+# Animateur propre à chaque processus de travail, réutilisé d'une commune à l'autre
+_animators = {}
+
+
+def animate_commune(commune, df, start_year, end_year, output_dir, fmt, fps, dpi):
+    """Anime une commune (exécuté dans un processus de travail)"""
+    enable_headless()
+    start = time.perf_counter()
+    years = tuple(range(start_year, end_year + 1))
+    if years not in _animators:
+        _animators[years] = DashboardAnimator(years, output_dir, fmt=fmt, fps=fps, dpi=dpi)
+    path, count = _animators[years].animate(commune, df, start_year, end_year)
+    return commune, path, count, time.perf_counter() - start
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Animation année par année des tableaux de bord")
+    parser.add_argument('communes', nargs='*', help="Communes à animer (toutes par défaut)")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--format', choices=ANIMATION_FORMATS, default='auto')
+    parser.add_argument('--fps', type=int, default=4)
+    parser.add_argument('--dpi', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--heatmap', action='store_true', help="Anime la carte de chaleur insulaire")
+    args = parser.parse_args()
+
+    enable_headless()
+    print("🎞️ ANIMATION DES COMPTES COMMUNAUX")
+    print("=" * 60)
+
+    communes = [commune_entry(c)[2] for c in args.communes] or None
+    panel = IslandPanel(seed=args.seed, communes=communes).build()
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"📼 Format: {resolve_format(args.format)}")
+
+    start = time.perf_counter()
+    if args.heatmap:
+        path, count = animate_heatmap(panel, args.output_dir, args.format, args.fps, args.dpi)
+        print(f"✅ Carte de chaleur: {path} ({count} images)")
+    else:
+        # spawn : processus propres, sans hériter de l'état de matplotlib du parent
+        with ProcessPoolExecutor(args.workers or min(len(panel.communes), os.cpu_count() or 1),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(animate_commune, commune, panel.frames[commune], panel.start_year,
+                                       panel.end_year, args.output_dir, args.format, args.fps, args.dpi)
+                       for commune in panel.communes]
+            for future in futures:
+                commune, path, count, seconds = future.result()
+                print(f"✅ {commune}: {path} ({count} images, {seconds:.1f}s)")
+
+    print(f"\n⏱️ Terminé en {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import argparse
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+from benchmark import CommuneBenchmark
+from communes import COMMUNES, commune_entry
+from dataset import DATASET_DIR, PanelDataset
+from panel import INDICATORS, IslandPanel
+from sql_store import DATABASE_FILE, AccountStore
+
+# Fenêtre des moyennes glissantes (années)
+WINDOW = 3
+
+
+def last_lines(path, n=1, block=4096):
+    """Dernières lignes d'un fichier texte, lues depuis la fin sans parcourir l'historique"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        read = min(block, size)
+        while True:
+            f.seek(size - read)
+            lines = f.read(read).rstrip(b'\r\n').splitlines()
+            # Une ligne de plus que demandé : la première, peut-être tronquée, est écartée
+            if len(lines) > n or read == size:
+                break
+            read = min(read * 2, size)
+    return [line.decode('utf-8') for line in lines[-n:]]
+
+
+def tail_frame(path, n):
+    """Dernières lignes d'un CSV, avec les colonnes de son en-tête"""
+    with open(path, encoding='utf-8') as f:
+        header = f.readline().rstrip('\r\n')
+    lines = [line for line in last_lines(path, n) if line != header]
+    return pd.read_csv(io.StringIO('\n'.join([header] + lines)))
+
+
+def year_frame(df, year):
+    """Lignes d'une seule année (Commune, Annee, colonnes), une par commune connue"""
+    df = df[df['Annee'] == year].copy()
+    if df.empty:
+        raise ValueError(f"Aucune ligne pour l'année {year}")
+    df['Commune'] = [commune_entry(c)[2] for c in df['Commune']]
+    if df['Commune'].duplicated().any():
+        raise ValueError(f"Plusieurs lignes par commune pour l'année {year}")
+    return df.reset_index(drop=True)
+
+
+def extrapolate_year(history, year, rng):
+    """Ligne d'un exercice prolongeant la tendance et la dispersion des dernières années d'une commune"""
+    history = history[history['Annee'] < year].sort_values('Annee')
+    if history.empty or history['Annee'].iloc[-1] != year - 1:
+        raise ValueError(f"Pas d'exercice {year - 1} à prolonger")
+    columns = [c for c in history.columns if c != 'Annee']
+    values = history[columns].to_numpy(dtype=float)
+    # Pas annuels moyens et leur écart-type (les générateurs communaux sont des tendances linéaires bruitées)
+    steps = np.diff(values, axis=0)
+    counts = np.maximum((~np.isnan(steps)).sum(axis=0), 1)
+    drift = np.nansum(steps, axis=0) / counts
+    spread = np.sqrt(np.nansum((steps - drift) ** 2, axis=0) / counts)
+    new = values[-1] + drift + rng.normal(0, 1, len(columns)) * spread
+    # Une grandeur restée positive sur la fenêtre ne devient pas négative
+    new = np.where(np.fmin.reduce(values, axis=0) >= 0, np.maximum(new, 0), new)
+    return pd.DataFrame([[year, *new]], columns=['Annee'] + columns)
+
+
+class AnnualUpdater:
+    """Ajout d'un exercice aux magasins (CSV, Parquet partitionné, SQLite) sans réécrire l'historique"""
+
+    def __init__(self, csv_dir='.', dataset_root=DATASET_DIR, database=DATABASE_FILE, scenario='central',
+                 run=0, window=WINDOW):
+        self.csv_dir = csv_dir
+        self.dataset = PanelDataset(dataset_root)
+        self.store = AccountStore(database)
+        self.scenario = scenario
+        self.run = run
+        self.window = window
+        self.communes = [c[2] for c in COMMUNES]
+
+    def csv_path(self, commune):
+        """CSV d'une commune (même nom que l'export de columnar.py)"""
+        return os.path.join(self.csv_dir, f'{commune_entry(commune)[3]}_financial_data.csv')
+
+    def initialize(self, panel, output_dir=None, workers=None, dpi=100):
+        """Écrit l'historique complet une fois, puis les indicateurs dérivés de chaque année
+
+        Avec output_dir, rend aussi les images de panneaux et les tableaux de bord que les mises à jour
+        réutilisent.
+        """
+        os.makedirs(self.csv_dir, exist_ok=True)
+        for commune in panel.communes:
+            panel.frames[commune].to_csv(self.csv_path(commune), index=False)
+        self.dataset.write(panel.values, self.scenario, panel.communes, panel.years, first_run=self.run)
+        self.store.upsert_panel(panel, self.scenario, self.run)
+        for year in panel.years[1:]:
+            self.update_derived(int(year))
+        if output_dir is not None:
+            from dashboard import dashboard_title
+            from panels import PanelRenderer
+
+            os.makedirs(output_dir, exist_ok=True)
+            renderer = PanelRenderer(output_dir, workers=workers, dpi=dpi)
+            for commune in panel.communes:
+                renderer.render(commune, panel.frames[commune],
+                                dashboard_title(commune, panel.start_year, panel.end_year))
+            renderer.close()
+
+    def simulate_year(self, year, seed=None):
+        """Comptes simulés d'un exercice, prolongés depuis les dernières lignes de chaque CSV
+
+        Seule la fenêtre récente est lue : le coût ne croît pas avec l'historique. Avec une graine,
+        une reprise après échec produit les mêmes lignes.
+        """
+        rng = np.random.default_rng(None if seed is None else [seed, year])
+        depth = max(self.window, 2) + 1
+        rows = []
+        for commune in self.communes:
+            # Une ligne de plus au cas où l'exercice serait déjà dans le CSV : même historique à la reprise
+            history = tail_frame(self.csv_path(commune), depth + 1)
+            history = history[history['Annee'] < year].tail(depth)
+            rows.append(extrapolate_year(history, year, rng).assign(Commune=commune))
+        return pd.concat(rows, ignore_index=True)
+
+    def check_year(self, year):
+        """L'exercice doit suivre le dernier exercice enregistré ; True pour reprendre un ajout interrompu
+
+        La base SQLite est écrite en dernier, ses indicateurs dérivés en toute fin : un exercice n'est
+        complet qu'une fois ceux-ci enregistrés.
+        """
+        years = self.store.years(self.scenario, self.run)
+        if not years:
+            raise ValueError("Magasins vides : lancer d'abord l'initialisation (--init)")
+        if year in years:
+            if year in self.store.derived_years(self.scenario, self.run):
+                raise ValueError(f"L'exercice {year} est déjà enregistré")
+            return True
+        if year != years[-1] + 1:
+            raise ValueError(f"L'exercice {year} ne suit pas le dernier exercice enregistré ({years[-1]})")
+        return False
+
+    def append_csv(self, rows):
+        """Ajoute une ligne en fin de chaque CSV, dans l'ordre de son en-tête
+
+        Un CSV qui contient déjà l'exercice (ajout interrompu) est laissé tel quel s'il porte les mêmes
+        valeurs.
+        """
+        # Vérification de tous les fichiers avant d'écrire : pas d'ajout partiel
+        headers = {}
+        pending = []
+        for i, (commune, year) in enumerate(zip(rows['Commune'], rows['Annee'])):
+            path = self.csv_path(commune)
+            stored = tail_frame(path, 1)
+            headers[commune] = stored.columns
+            last_year = int(stored['Annee'].iloc[-1])
+            if last_year == year:
+                columns = [c for c in stored.columns if c in rows.columns and c != 'Annee']
+                incoming = rows.iloc[[i]][columns].to_numpy(dtype=float)
+                if not np.allclose(stored[columns].to_numpy(dtype=float), incoming, equal_nan=True):
+                    raise ValueError(f"{path} contient déjà l'exercice {year} avec d'autres valeurs")
+            elif last_year == year - 1:
+                pending.append(i)
+            else:
+                raise ValueError(f"{path} se termine en {last_year}, pas en {year - 1}")
+        dropped = set()
+        for i in pending:
+            commune = rows['Commune'].iloc[i]
+            # Tranche d'une ligne : chaque colonne garde son type (Annee reste entière)
+            row = rows.iloc[[i]]
+            dropped |= set(row.dropna(axis=1).columns) - set(headers[commune]) - {'Commune'}
+            row.reindex(columns=headers[commune]).to_csv(self.csv_path(commune), mode='a', header=False,
+                                                        index=False)
+        return sorted(dropped)
+
+    def append(self, rows):
+        """Enregistre un exercice dans les trois magasins puis recalcule ses seuls indicateurs dérivés
+
+        Chaque étape est idempotente (CSV déjà complété laissé tel quel, fichiers Parquet du run remplacés,
+        upserts SQLite) : relancer un ajout interrompu le termine sans dupliquer l'exercice.
+        """
+        year = int(rows['Annee'].iloc[0])
+        resumed = self.check_year(year)
+        communes = list(rows['Commune'])
+        values = rows.reindex(columns=INDICATORS).to_numpy(dtype=float)[:, None, :]
+        timings = {}
+
+        start = time.perf_counter()
+        dropped = self.append_csv(rows)
+        timings['csv'] = time.perf_counter() - start
+        start = time.perf_counter()
+        self.dataset.write(values, self.scenario, communes, [year], first_run=self.run)
+        timings['parquet'] = time.perf_counter() - start
+        start = time.perf_counter()
+        self.store.upsert_values(values, communes, [year], self.scenario, self.run)
+        timings['sqlite'] = time.perf_counter() - start
+        start = time.perf_counter()
+        self.update_derived(year)
+        timings['derived'] = time.perf_counter() - start
+        return timings, dropped, resumed
+
+    def update_derived(self, year):
+        """Croissance, moyenne glissante, rang et centile d'une année, lus sur la seule fenêtre utile"""
+        years, values = self.store.cube(self.scenario, self.run, self.communes,
+                                        start_year=year - max(self.window, 2) + 1, end_year=year)
+        if years[-1] != year:
+            raise ValueError(f"L'exercice {year} est absent de la base")
+        current = values[:, -1:, :]
+        # Croissance annuelle : NaN si l'exercice précédent manque ou vaut zéro
+        previous = values[:, -2:-1, :] if len(years) > 1 and years[-2] == year - 1 else np.full_like(current, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = np.where(previous != 0, current / previous - 1, np.nan)
+        # Moyenne glissante sur les années disponibles de la fenêtre
+        window = values[:, -self.window:, :]
+        counts = (~np.isnan(window)).sum(axis=1, keepdims=True)
+        rolling = np.where(counts > 0, np.nansum(window, axis=1, keepdims=True) / np.maximum(counts, 1), np.nan)
+        # Rangs inter-communaux de l'année seule ; pas de rang pour une valeur manquante
+        benchmark = CommuneBenchmark(IslandPanel(start_year=year, end_year=year, communes=self.communes))
+        normalized, ranks, percentiles = benchmark.rank(current)
+        missing = np.isnan(normalized)
+
+        metrics = {'croissance': growth, f'moyenne_{self.window}ans': rolling,
+                   'rang': np.where(missing, np.nan, ranks), 'centile': np.where(missing, np.nan, percentiles)}
+        for metric, metric_values in metrics.items():
+            self.store.upsert_derived(metric, metric_values, self.communes, [year], self.scenario, self.run)
+        return metrics
+
+    def render(self, communes, output_dir='.', workers=None, dpi=100):
+        """Rend à nouveau les panneaux dont les données tracées ont changé puis réassemble le tableau de bord"""
+        from dashboard import PANELS, dashboard_title
+        from panels import PanelRenderer
+
+        os.makedirs(output_dir, exist_ok=True)
+        renderer = PanelRenderer(output_dir, workers=workers, dpi=dpi)
+        rendered = {}
+        for commune in communes:
+            df = pd.read_csv(self.csv_path(commune))
+            # Empreinte par panneau : une image manquante ou périmée est rendue, les autres sont gardées
+            stale = renderer.stale_panels(commune, df)
+            if stale:
+                renderer.render(commune, df, '', panels=stale, assemble=False)
+            # Tableau de bord aussi réassemblé s'il est plus ancien que ses images (ajout interrompu)
+            dashboard = renderer.dashboard_path(commune)
+            newest = max(os.path.getmtime(renderer.panel_path(commune, name)) for name in PANELS)
+            if stale or not os.path.exists(dashboard) or os.path.getmtime(dashboard) < newest:
+                title = dashboard_title(commune, int(df['Annee'].min()), int(df['Annee'].max()))
+                renderer.assemble(commune, title)
+            rendered[commune] = stale
+        renderer.close()
+        return rendered
+
+    def close(self):
+        """Ferme la base"""
+        self.store.close()
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Mise à jour annuelle incrémentale des comptes communaux")
+    parser.add_argument('--init', action='store_true', help="Écrit l'historique complet dans des magasins vides")
+    parser.add_argument('--year', type=int, default=None, help="Exercice à ajouter")
+    parser.add_argument('--source', default=None, help="CSV Commune, Annee, colonnes (ex. sortie de official.py)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--csv-dir', default='.')
+    parser.add_argument('--dataset', default=DATASET_DIR)
+    parser.add_argument('--database', default=DATABASE_FILE)
+    parser.add_argument('--scenario', default='central')
+    parser.add_argument('--window', type=int, default=WINDOW)
+    parser.add_argument('--render', action='store_true',
+                        help="Avec --init, rend tous les panneaux ; sinon ceux dont les données tracées ont changé")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=100)
+    args = parser.parse_args()
+
+    print("📅 MISE À JOUR ANNUELLE INCRÉMENTALE")
+    print("=" * 60)
+
+    updater = AnnualUpdater(args.csv_dir, args.dataset, args.database, args.scenario, window=args.window)
+    if args.init:
+        start = time.perf_counter()
+        panel = IslandPanel(seed=args.seed, end_year=args.year or 2025).build()
+        updater.initialize(panel, args.output_dir if args.render else None, args.workers, args.dpi)
+        print(f"🗃️ Historique {panel.start_year}-{panel.end_year} écrit en {time.perf_counter() - start:.1f}s")
+        updater.close()
+        return
+
+    # Exercice suivant le dernier exercice complet (un ajout interrompu est repris)
+    years = updater.store.derived_years(args.scenario)
+    year = args.year or (years[-1] + 1 if years else 2026)
+    if args.source:
+        rows = year_frame(pd.read_csv(args.source), year)
+    else:
+        print(f"🎲 Exercice {year} simulé à partir des {max(args.window, 2) + 1} exercices précédents")
+        rows = year_frame(updater.simulate_year(year, args.seed), year)
+
+    timings, dropped, resumed = updater.append(rows)
+    print(f"➕ Exercice {year}: {len(rows)} communes {'complétées (reprise)' if resumed else 'ajoutées'} "
+          f"en {sum(timings.values()) * 1000:.0f} ms")
+    for store, seconds in timings.items():
+        print(f"   {store}: {seconds * 1000:.0f} ms")
+    if dropped:
+        print(f"⚠️ Colonnes absentes des CSV existants, ignorées: {', '.join(dropped)}")
+
+    if args.render:
+        from dashboard import PANELS
+
+        start = time.perf_counter()
+        rendered = updater.render(rows['Commune'], args.output_dir, args.workers, args.dpi)
+        count = sum(len(panels) for panels in rendered.values())
+        print(f"🖼️ {count} panneaux rendus à nouveau sur {len(rendered) * len(PANELS)} "
+              f"en {time.perf_counter() - start:.1f}s")
+    updater.close()
+
+
+if __name__ == "__main__":
+    main()
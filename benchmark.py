@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from communes import load_analyzer
+from panel import IslandPanel
+
+# Montants en M€ ramenés en € par habitant
+PER_CAPITA_INDICATORS = ['Recettes_Totales', 'Impots_Locaux', 'Dotations_Etat', 'Autres_Recettes',
+                         'Depenses_Totales', 'Fonctionnement', 'Investissement', 'Charge_Dette',
+                         'Personnel', 'Epargne_Brute', 'Dette_Totale']
+
+LABELS = {
+    'Population': 'population',
+    'Menages': 'ménages',
+    'Recettes_Totales': 'recettes par habitant',
+    'Impots_Locaux': 'impôts locaux par habitant',
+    'Dotations_Etat': "dotations de l'État par habitant",
+    'Autres_Recettes': 'autres recettes par habitant',
+    'Depenses_Totales': 'dépenses par habitant',
+    'Fonctionnement': 'fonctionnement par habitant',
+    'Investissement': 'investissement par habitant',
+    'Charge_Dette': 'charge de la dette par habitant',
+    'Personnel': 'personnel par habitant',
+    'Epargne_Brute': 'épargne brute par habitant',
+    'Dette_Totale': 'dette par habitant',
+    'Taux_Endettement': "taux d'endettement",
+    'Taux_Fiscalite': 'taux de fiscalité',
+}
+
+
+def ordinal(rank):
+    """Ordinal français abrégé (1er, 2e, ...)"""
+    return '1er' if rank == 1 else f'{rank}e'
+
+
+class CommuneBenchmark:
+    """Classements et centiles inter-communaux calculés en une passe vectorisée"""
+
+    def __init__(self, panel, peer_groups=None):
+        self.panel = panel
+        # Dictionnaire commune → pairs (voir clustering.py), pour des rangs au sein du groupe
+        self.peer_groups = peer_groups
+        self.per_capita_mask = np.array([name in PER_CAPITA_INDICATORS for name in panel.indicators])
+
+    def per_capita(self, values):
+        """Ramène les montants (..., communes, années, indicateurs) en € par habitant"""
+        population = values[..., self.panel.indicators.index('Population')]
+        scale = np.where(self.per_capita_mask, 1e6 / population[..., None], 1.0)
+        return values * scale
+
+    def rank(self, values):
+        """Rangs (1 = valeur la plus élevée) et centiles le long de l'axe des communes"""
+        normalized = self.per_capita(values)
+        n_communes = normalized.shape[-3]
+        order = np.argsort(-normalized, axis=-3, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, n_communes + 1).reshape(-1, 1, 1), axis=-3)
+        percentiles = (n_communes - ranks) / max(n_communes - 1, 1) * 100
+        return normalized, ranks, percentiles
+
+    def rank_distribution(self, ensemble):
+        """Fréquence de chaque rang sur un ensemble (runs, communes, années, indicateurs)"""
+        _, ranks, _ = self.rank(ensemble)
+        n_runs, n_communes, n_years, n_indicators = ranks.shape
+        cells = np.arange(n_communes * n_years * n_indicators).reshape(n_communes, n_years, n_indicators)
+        index = cells * n_communes + (ranks - 1)
+        counts = np.bincount(index.ravel(), minlength=cells.size * n_communes)
+        return counts.reshape(n_communes, n_years, n_indicators, n_communes) / n_runs
+
+    def to_frame(self):
+        """Valeurs normalisées, rangs et centiles du panel au format long"""
+        normalized, ranks, percentiles = self.rank(self.panel.values)
+        n_communes, n_years, n_indicators = ranks.shape
+        return pd.DataFrame({
+            'Commune': np.repeat(self.panel.communes, n_years * n_indicators),
+            'Annee': np.tile(np.repeat(self.panel.years, n_indicators), n_communes),
+            'Indicateur': np.tile(self.panel.indicators, n_communes * n_years),
+            'Valeur': normalized.ravel(),
+            'Rang': ranks.ravel(),
+            'Centile': percentiles.ravel(),
+        })
+
+    def comparative_insights(self, commune, year=None, indicators=None):
+        """Phrases comparatives d'une commune pour une année (la dernière par défaut)"""
+        year = self.panel.end_year if year is None else year
+        if year not in self.panel.years:
+            raise ValueError(f"Année {year} hors du panel ({self.panel.start_year}-{self.panel.end_year})")
+        normalized, ranks, _ = self.rank(self.panel.values)
+        i = self.panel.communes.index(commune)
+        y = int(np.searchsorted(self.panel.years, year))
+        if self.peer_groups:
+            peers = [self.panel.communes.index(c) for c in self.peer_groups[commune]]
+            peer_ranks = (normalized[peers, y] > normalized[i, y]).sum(0) + 1
+        lines = []
+        for name in indicators or self.panel.indicators:
+            k = self.panel.indicators.index(name)
+            if name in PER_CAPITA_INDICATORS:
+                value = f"{normalized[i, y, k]:,.0f} €/hab".replace(',', ' ')
+            elif name == 'Taux_Endettement':
+                value = f"{normalized[i, y, k] * 100:.1f}%"
+            elif name == 'Taux_Fiscalite':
+                value = f"{normalized[i, y, k]:.2f}"
+            else:
+                value = f"{normalized[i, y, k]:,.0f}".replace(',', ' ')
+            label = LABELS[name][0].upper() + LABELS[name][1:]
+            line = f"{label}: {ordinal(ranks[i, y, k])} sur {len(self.panel.communes)}"
+            if self.peer_groups and len(peers) > 1:
+                line += f", {ordinal(peer_ranks[k])} sur {len(peers)} parmi ses pairs"
+            lines.append(f"{line} ({value})")
+        return lines
+
+    def print_comparative_insights(self, commune, year=None):
+        """Affiche la section comparative des insights d'une commune"""
+        year = self.panel.end_year if year is None else year
+        print(f"\n📊 POSITION DE {commune.upper()} PARMI LES COMMUNES ({year}):")
+        for line in self.comparative_insights(commune, year):
+            print(f"• {line}")
+
+
+def main():
+    """Fonction principale"""
+    print("📊 CLASSEMENT COMPARATIF DES COMMUNES DE LA RÉUNION")
+    print("=" * 60)
+
+    from clustering import PeerGroupClustering
+
+    panel = IslandPanel().build()
+    benchmark = CommuneBenchmark(panel, PeerGroupClustering(panel).fit().peer_groups())
+
+    output_file = f'benchmark_communes_{panel.start_year}_{panel.end_year}.csv'
+    benchmark.to_frame().to_csv(output_file, index=False)
+    print(f"💾 Classements sauvegardés: {output_file}")
+
+    # Insights de chaque commune complétés par sa position parmi les autres
+    for commune in panel.communes:
+        print()
+        load_analyzer(commune)._generate_financial_insights(panel.frames[commune])
+        benchmark.print_comparative_insights(commune)
+
+
+if __name__ == "__main__":
+    main()
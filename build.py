@@ -0,0 +1,175 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import time
+import pandas as pd
+from communes import COMMUNES, commune_entry, load_analyzer
+from headless import enable_headless
+from panel import IslandPanel
+
+MANIFEST_FILE = 'build_manifest.json'
+
+# Modules partagés dont dépendent les sorties de chaque commune
+SHARED_SOURCES = ['communes.py', 'panel.py', 'headless.py', 'plotting.py', 'build.py']
+
+OUTPUTS = ['csv', 'figure', 'report']
+
+
+def source_digest(paths):
+    """Empreinte du code source (paramètres des communes et version du code)"""
+    digest = hashlib.sha256()
+    base = os.path.dirname(os.path.abspath(__file__))
+    for path in paths:
+        with open(os.path.join(base, path), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class IncrementalBuilder:
+    """Reconstruit seulement les sorties communales périmées, à la manière de make"""
+
+    def __init__(self, output_dir='.', seed=None, start_year=2002, end_year=2025):
+        self.output_dir = output_dir
+        self.panel = IslandPanel(seed=seed, start_year=start_year, end_year=end_year)
+        self.shared_digest = source_digest(SHARED_SOURCES)
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        """Charge le manifeste des empreintes déjà construites"""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        """Écrit le manifeste de façon atomique"""
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def fingerprint(self, commune):
+        """Empreinte des entrées d'une commune : script, code partagé, graine et période"""
+        module_name = commune_entry(commune)[0]
+        payload = {
+            'script': source_digest([f'{module_name}.py']),
+            'shared': self.shared_digest,
+            'seed': self.panel.commune_seed(commune),
+            'start_year': self.panel.start_year,
+            'end_year': self.panel.end_year,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def output_paths(self, commune):
+        """Chemins des sorties d'une commune"""
+        slug = commune_entry(commune)[3]
+        period = f'{self.panel.start_year}_{self.panel.end_year}'
+        return {
+            'csv': os.path.join(self.output_dir, f'{slug}_financial_data_{period}.csv'),
+            'figure': os.path.join(self.output_dir, f'{slug}_financial_analysis.png'),
+            'report': os.path.join(self.output_dir, f'{slug}_financial_insights.txt'),
+        }
+
+    def stale_outputs(self, commune):
+        """Liste des sorties à reconstruire pour une commune"""
+        fingerprint = self.fingerprint(commune)
+        recorded = self.manifest.get(commune, {})
+        paths = self.output_paths(commune)
+        return [kind for kind in OUTPUTS
+                if recorded.get(kind) != fingerprint or not os.path.exists(paths[kind])]
+
+    def _render(self, commune, df, figure=True):
+        """Produit la figure (si demandée) et le rapport d'insights dans le dossier de sortie"""
+        analyzer = load_analyzer(commune)
+        analyzer.start_year = self.panel.start_year
+        analyzer.end_year = self.panel.end_year
+        buffer = io.StringIO()
+        if not figure:
+            with contextlib.redirect_stdout(buffer):
+                analyzer._generate_financial_insights(df)
+            return buffer.getvalue()
+
+        # create_financial_analysis enregistre la figure dans le dossier courant
+        cwd = os.getcwd()
+        os.chdir(self.output_dir)
+        try:
+            with contextlib.redirect_stdout(buffer):
+                analyzer.create_financial_analysis(df, show=False)
+        finally:
+            os.chdir(cwd)
+        return buffer.getvalue()
+
+    def build_commune(self, commune, force=False):
+        """Reconstruit les sorties périmées d'une commune"""
+        stale = list(OUTPUTS) if force else self.stale_outputs(commune)
+        if not stale:
+            return stale
+        paths = self.output_paths(commune)
+
+        # Les données déjà à jour sont relues plutôt que régénérées
+        if 'csv' in stale:
+            df = self.panel.generate_commune(commune)
+            df.to_csv(paths['csv'], index=False)
+        else:
+            df = pd.read_csv(paths['csv'])
+
+        if 'figure' in stale or 'report' in stale:
+            report = self._render(commune, df, figure='figure' in stale)
+            with open(paths['report'], 'w', encoding='utf-8') as f:
+                f.write(report)
+
+        fingerprint = self.fingerprint(commune)
+        self.manifest[commune] = {kind: fingerprint for kind in OUTPUTS}
+        self._save_manifest()
+        return stale
+
+    def build(self, communes=None, force=False):
+        """Reconstruit les communes demandées (toutes par défaut)"""
+        rebuilt = {}
+        for commune in communes or self.panel.communes:
+            start = time.perf_counter()
+            stale = self.build_commune(commune, force=force)
+            if stale:
+                rebuilt[commune] = stale
+                print(f"🔨 {commune}: {', '.join(stale)} ({time.perf_counter() - start:.2f}s)")
+            else:
+                print(f"✅ {commune}: à jour")
+        return rebuilt
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Construction incrémentale des sorties communales")
+    parser.add_argument('communes', nargs='*', help="Communes à construire (toutes par défaut)")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--start-year', type=int, default=2002)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--force', action='store_true', help="Reconstruit même les sorties à jour")
+    args = parser.parse_args()
+
+    # Backend non interactif : la construction ne doit jamais ouvrir de fenêtre
+    enable_headless()
+
+    print("🔨 CONSTRUCTION INCRÉMENTALE DES COMPTES COMMUNAUX")
+    print("=" * 60)
+    if args.seed is None:
+        print("⚠️ Sans --seed, les données ne sont pas reproductibles d'une construction à l'autre")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    builder = IncrementalBuilder(args.output_dir, seed=args.seed,
+                                 start_year=args.start_year, end_year=args.end_year)
+    start = time.perf_counter()
+    rebuilt = builder.build([commune_entry(c)[2] for c in args.communes] or None, force=args.force)
+
+    print(f"\n✅ {len(rebuilt)} commune(s) reconstruite(s) sur {len(args.communes) or len(COMMUNES)} "
+          f"en {time.perf_counter() - start:.2f}s")
+    print(f"📋 Manifeste: {builder.manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from benchmark import CommuneBenchmark
+from panel import IslandPanel, build_ensemble
+
+
+class PeerGroupClustering:
+    """Groupes de pairs : k-means sur les trajectoires par habitant standardisées"""
+
+    def __init__(self, panel, n_clusters=4, n_init=10, max_iter=100, seed=0):
+        self.panel = panel
+        self.benchmark = CommuneBenchmark(panel)
+        self.n_clusters = n_clusters
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.seed = seed
+        self.labels = None
+
+    def features(self, values):
+        """Trajectoires (..., communes, années × indicateurs) standardisées entre communes"""
+        normalized = self.benchmark.per_capita(values)
+        # Population et ménages sont comparés en ordre de grandeur
+        sizes = [self.panel.indicators.index(name) for name in ('Population', 'Menages')]
+        normalized[..., sizes] = np.log(normalized[..., sizes])
+        features = normalized.reshape(*normalized.shape[:-2], -1)
+        std = features.std(axis=-2, keepdims=True)
+        return (features - features.mean(axis=-2, keepdims=True)) / np.where(std > 0, std, 1.0)
+
+    def _kmeans(self, X, rng):
+        """k-means de Lloyd vectorisé sur un lot de jeux (lots, communes, variables)"""
+        n_batch, n_communes, _ = X.shape
+        batch = np.arange(n_batch)
+
+        # Initialisation k-means++ menée en parallèle sur tous les lots
+        centers = [X[batch, rng.integers(n_communes, size=n_batch)]]
+        for _ in range(1, self.n_clusters):
+            d2 = np.min([((X - c[:, None]) ** 2).sum(-1) for c in centers], axis=0)
+            cumulative = np.cumsum(d2, axis=1)
+            draws = rng.random(n_batch) * cumulative[:, -1]
+            chosen = np.minimum((cumulative < draws[:, None]).sum(1), n_communes - 1)
+            centers.append(X[batch, chosen])
+        centers = np.stack(centers, axis=1)
+
+        labels = np.zeros((n_batch, n_communes), dtype=int)
+        x2 = (X ** 2).sum(-1)[..., None]
+        for _ in range(self.max_iter):
+            # |x - c|² développé pour passer par un produit matriciel
+            d2 = x2 - 2 * X @ centers.transpose(0, 2, 1) + (centers ** 2).sum(-1)[:, None, :]
+            new_labels = d2.argmin(-1)
+            onehot = np.eye(self.n_clusters)[new_labels]
+            counts = onehot.sum(1)
+            sums = onehot.transpose(0, 2, 1) @ X
+            # Un groupe vidé garde son centre précédent
+            centers = np.where(counts[..., None] > 0, sums / np.maximum(counts, 1)[..., None], centers)
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+        inertia = np.take_along_axis(d2, labels[..., None], -1)[..., 0].sum(-1)
+        return labels, inertia
+
+    def cluster(self, values):
+        """Étiquettes (..., communes) pour un panel ou un ensemble de runs"""
+        X = self.features(values)
+        lead_shape = X.shape[:-2]
+        X = X.reshape(-1, *X.shape[-2:])
+        n_batch = X.shape[0]
+
+        # Plusieurs initialisations par jeu, on garde la plus faible inertie ; une initialisation à la
+        # fois sur tous les jeux : la mémoire ne dépend pas de n_init
+        rng = np.random.default_rng(self.seed)
+        labels, inertia = self._kmeans(X, rng)
+        for _ in range(1, self.n_init):
+            candidate, candidate_inertia = self._kmeans(X, rng)
+            better = candidate_inertia < inertia
+            labels = np.where(better[:, None], candidate, labels)
+            inertia = np.where(better, candidate_inertia, inertia)
+
+        # Groupes numérotés par population moyenne décroissante pour des libellés stables
+        population = values[..., self.panel.indicators.index('Population')].mean(-1).reshape(n_batch, -1)
+        onehot = np.eye(self.n_clusters)[labels]
+        mean_population = np.einsum('bck,bc->bk', onehot, population) / np.maximum(onehot.sum(1), 1)
+        order = np.argsort(np.argsort(-mean_population, axis=-1), axis=-1)
+        labels = np.take_along_axis(order, labels, -1)
+        return labels.reshape(*lead_shape, -1)
+
+    def fit(self):
+        """Groupes de pairs du panel"""
+        self.labels = self.cluster(self.panel.values)
+        return self
+
+    def co_assignment(self, ensemble):
+        """Fréquence à laquelle deux communes partagent un groupe sur un ensemble de runs"""
+        onehot = np.eye(self.n_clusters)[self.cluster(ensemble)]
+        return np.einsum('rck,rdk->cd', onehot, onehot) / len(ensemble)
+
+    def stability(self, ensemble):
+        """Stabilité de chaque commune : co-affectation moyenne avec ses pairs du panel"""
+        if self.labels is None:
+            self.fit()
+        co = self.co_assignment(ensemble)
+        same = self.labels[:, None] == self.labels[None, :]
+        np.fill_diagonal(same, False)
+        peers = same.sum(1)
+        return np.where(peers > 0, (co * same).sum(1) / np.maximum(peers, 1), 1.0)
+
+    def peer_groups(self):
+        """Dictionnaire commune → liste de ses pairs (elle comprise)"""
+        if self.labels is None:
+            self.fit()
+        return {commune: [c for c, label in zip(self.panel.communes, self.labels) if label == self.labels[i]]
+                for i, commune in enumerate(self.panel.communes)}
+
+    def to_frame(self):
+        """Groupe de pairs de chaque commune"""
+        if self.labels is None:
+            self.fit()
+        return pd.DataFrame({'Commune': self.panel.communes, 'Groupe': self.labels + 1})
+
+
+def main():
+    """Fonction principale"""
+    print("🧩 GROUPES DE PAIRS DES COMMUNES DE LA RÉUNION")
+    print("=" * 60)
+
+    panel = IslandPanel(seed=0).build()
+    clustering = PeerGroupClustering(panel).fit()
+
+    # Stabilité des groupes sur un petit ensemble de runs
+    print("🎲 Génération d'un ensemble de 20 runs pour la stabilité...")
+    stability = clustering.stability(build_ensemble(20, seed=1))
+
+    for group in range(clustering.n_clusters):
+        members = [i for i, label in enumerate(clustering.labels) if label == group]
+        print(f"\n🏘️ Groupe {group + 1} ({len(members)} communes):")
+        for i in members:
+            print(f"• {panel.communes[i]} (stabilité {stability[i] * 100:.0f}%)")
+
+    output_file = 'peer_groups_communes.csv'
+    df = clustering.to_frame()
+    df['Stabilite'] = stability
+    df.to_csv(output_file, index=False)
+    print(f"\n💾 Groupes sauvegardés: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
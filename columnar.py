@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from communes import COMMUNES, commune_entry
+from panel import IslandPanel
+
+ISLAND_FILE = 'reunion_financial_data.parquet'
+COMPRESSION = 'zstd'
+
+
+def require_pyarrow():
+    """Importe pyarrow, dépendance facultative réservée à l'export colonnaire"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("L'export colonnaire nécessite pyarrow (pip install pyarrow)") from exc
+    return pyarrow
+
+
+def schema_for(columns):
+    """Schéma explicite : commune encodée en dictionnaire, année entière, montants en float64"""
+    pa = require_pyarrow()
+    fields = [pa.field('Commune', pa.dictionary(pa.int8(), pa.string()), nullable=False),
+              pa.field('Annee', pa.int16(), nullable=False)]
+    fields += [pa.field(column, pa.float64()) for column in columns if column not in ('Commune', 'Annee')]
+    return pa.schema(fields)
+
+
+def to_table(df, commune):
+    """Table Arrow d'une commune, la colonne Commune en tête"""
+    pa = require_pyarrow()
+    df = df.copy()
+    df.insert(0, 'Commune', commune_entry(commune)[2])
+    return pa.Table.from_pandas(df, schema=schema_for(df.columns), preserve_index=False)
+
+
+def write_commune(df, commune, path=None, compression=COMPRESSION):
+    """Écrit le fichier Parquet d'une commune ; renvoie son chemin"""
+    pa = require_pyarrow()
+    path = path or f'{commune_entry(commune)[3]}_financial_data.parquet'
+    pa.parquet.write_table(to_table(df, commune), path, compression=compression)
+    return path
+
+
+def write_island(panel, path=ISLAND_FILE, compression=COMPRESSION):
+    """Écrit les 24 communes dans un seul fichier (colonnes sectorielles nulles hors de leur commune)"""
+    pa = require_pyarrow()
+    tables = [to_table(panel.frames[commune], commune) for commune in panel.communes]
+    table = pa.concat_tables(tables, promote_options='default')
+    # Dictionnaire commun : les codes de Commune suivent l'ordre de COMMUNES
+    dictionary = pa.array(panel.communes, pa.string())
+    indices = pa.array(np.repeat(np.arange(len(panel.communes), dtype=np.int8),
+                                 [t.num_rows for t in tables]))
+    table = table.set_column(0, table.schema.field('Commune'), pa.DictionaryArray.from_arrays(indices, dictionary))
+    # Colonnes propres à chaque commune, pour reconstruire ses DataFrames sans chercher les colonnes nulles
+    columns = {commune: list(panel.frames[commune].columns) for commune in panel.communes}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           b'commune_columns': json.dumps(columns).encode()})
+    pa.parquet.write_table(table, path, compression=compression)
+    return path
+
+
+def read_commune(path):
+    """Relit le fichier Parquet d'une commune au format des scripts communaux"""
+    pa = require_pyarrow()
+    df = pa.parquet.read_table(path).to_pandas()
+    df['Annee'] = df['Annee'].astype('int64')
+    return df.drop(columns='Commune')
+
+
+def read_island(path=ISLAND_FILE, columns=None):
+    """Relit le fichier insulaire (colonnes facultativement restreintes) en DataFrame long"""
+    pa = require_pyarrow()
+    if columns is not None:
+        columns = ['Commune', 'Annee'] + [c for c in columns if c not in ('Commune', 'Annee')]
+    return pa.parquet.read_table(path, columns=columns).to_pandas()
+
+
+def load_island_panel(path=ISLAND_FILE):
+    """Reconstruit un IslandPanel depuis le fichier insulaire, sans regénérer ni relire de CSV"""
+    pa = require_pyarrow()
+    table = pa.parquet.read_table(path)
+    commune_columns = json.loads(table.schema.metadata[b'commune_columns'])
+    df = table.to_pandas()
+    df['Annee'] = df['Annee'].astype('int64')
+    communes = list(df['Commune'].cat.categories)
+    years = df['Annee'].to_numpy()
+    panel = IslandPanel(start_year=int(years.min()), end_year=int(years.max()), communes=communes)
+    codes = df['Commune'].cat.codes.to_numpy()
+    # Remplissage vectorisé du cube communes × années × indicateurs
+    panel.values[codes, years - panel.start_year] = df[panel.indicators].to_numpy(dtype=float)
+    # Les lignes sont groupées par commune : chaque DataFrame est une tranche contiguë
+    bounds = np.searchsorted(codes, np.arange(len(communes) + 1))
+    for i, commune in enumerate(communes):
+        panel.frames[commune] = df.iloc[bounds[i]:bounds[i + 1]][commune_columns[commune]].reset_index(drop=True)
+    panel.version += 1
+    return panel
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Export Parquet des communes et de l'île")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🧱 EXPORT COLONNAIRE DES COMPTES COMMUNAUX")
+    print("=" * 60)
+
+    panel = IslandPanel(seed=args.seed).build()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    for commune in panel.communes:
+        write_commune(panel.frames[commune], commune,
+                      os.path.join(args.output_dir, f'{commune_entry(commune)[3]}_financial_data.parquet'))
+    island_path = write_island(panel, os.path.join(args.output_dir, ISLAND_FILE))
+    parquet_write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_island_panel(island_path)
+    parquet_read = time.perf_counter() - start
+
+    # CSV de comparaison dans un répertoire temporaire : les exports CSV existants ne sont pas touchés
+    with tempfile.TemporaryDirectory() as csv_dir:
+        csv_paths = []
+        start = time.perf_counter()
+        for commune in panel.communes:
+            path = os.path.join(csv_dir, f'{commune_entry(commune)[3]}_financial_data.csv')
+            panel.frames[commune].to_csv(path, index=False)
+            csv_paths.append(path)
+        csv_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        csv_panel = IslandPanel(communes=panel.communes)
+        for commune, path in zip(panel.communes, csv_paths):
+            csv_panel.set_commune(commune, pd.read_csv(path))
+        csv_read = time.perf_counter() - start
+        csv_bytes = sum(os.path.getsize(path) for path in csv_paths)
+
+    print(f"💾 Fichier insulaire: {island_path} ({os.path.getsize(island_path) / 1e3:.0f} ko, "
+          f"CSV: {csv_bytes / 1e3:.0f} ko)")
+    print(f"✍️ Écriture: CSV {csv_write * 1000:.0f} ms, Parquet {parquet_write * 1000:.0f} ms")
+    print(f"📖 Chargement du panel: {len(csv_paths)} CSV {csv_read * 1000:.0f} ms, "
+          f"Parquet {parquet_read * 1000:.0f} ms")
+    print(f"✅ {len(COMMUNES)} communes exportées")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import importlib
+
+# Registre des 24 scripts communaux : (module, classe, commune, préfixe des fichiers, EPCI)
+COMMUNES = [
+    ('SDenis', 'SaintDenisFinanceAnalyzer', 'Saint-Denis', 'saint_denis', 'CINOR'),
+    ('SMarie', 'SainteMarieFinanceAnalyzer', 'Sainte-Marie', 'sainte_marie', 'CINOR'),
+    ('SSuzanne', 'SainteSuzanneFinanceAnalyzer', 'Sainte-Suzanne', 'sainte_suzanne', 'CINOR'),
+    ('SAndre', 'SaintAndreFinanceAnalyzer', 'Saint-André', 'saint_andre', 'CIREST'),
+    ('SBenoit', 'SaintBenoitFinanceAnalyzer', 'Saint-Benoît', 'saint_benoit', 'CIREST'),
+    ('Pdp', 'PlaineDesPalmistesFinanceAnalyzer', 'La Plaine des Palmistes', 'plaine_des_palmistes', 'CIREST'),
+    ('Salazie', 'SalazieFinanceAnalyzer', 'Salazie', 'salazie', 'CIREST'),
+    ('SRose', 'SainteRoseFinanceAnalyzer', 'Sainte-Rose', 'sainte_rose', 'CIREST'),
+    ('Port', 'LePortFinanceAnalyzer', 'Le Port', 'le_port', 'TCO'),
+    ('Possession', 'PossessionFinanceAnalyzer', 'La Possession', 'possession', 'TCO'),
+    ('SPaul', 'SaintPaulFinanceAnalyzer', 'Saint-Paul', 'saint_paul', 'TCO'),
+    # Saint-Gilles-les-Bains est modélisée à part dans ce projet, rattachée au TCO
+    ('SGilles', 'SaintGillesFinanceAnalyzer', 'Saint-Gilles-les-Bains', 'saint_gilles', 'TCO'),
+    ('TBassins', 'TroisBassinsFinanceAnalyzer', 'Trois-Bassins', 'trois_bassins', 'TCO'),
+    ('SLeu', 'SaintLeuFinanceAnalyzer', 'Saint-Leu', 'saint_leu', 'TCO'),
+    ('SPierre', 'SaintPierreFinanceAnalyzer', 'Saint-Pierre', 'saint_pierre', 'CIVIS'),
+    ('SLouis', 'SaintLouisFinanceAnalyzer', 'Saint-Louis', 'saint_louis', 'CIVIS'),
+    ('ESalé', 'EtangSaleFinanceAnalyzer', "L'Étang-Salé", 'etang_sale', 'CIVIS'),
+    ('PIles', 'PetiteIleFinanceAnalyzer', 'La Petite-Ile', 'petite_ile', 'CIVIS'),
+    ('Cilaos', 'CilaosFinanceAnalyzer', 'Cilaos', 'cilaos', 'CIVIS'),
+    ('Avirons', 'AvironsFinanceAnalyzer', 'Les Avirons', 'les_avirons', 'CIVIS'),
+    ('Tampon', 'TamponFinanceAnalyzer', 'Le Tampon', 'tampon', 'CASUD'),
+    ('SJoseph', 'SaintJosephFinanceAnalyzer', 'Saint-Joseph', 'saint_joseph', 'CASUD'),
+    ('EDeux', 'EntreDeuxFinanceAnalyzer', "L'Entre-Deux", 'entre_deux', 'CASUD'),
+    ('SPhilippe', 'SaintPhilippeFinanceAnalyzer', 'Saint-Philippe', 'saint_philippe', 'CASUD'),
+]
+
+EPCIS = ['CINOR', 'CIREST', 'TCO', 'CIVIS', 'CASUD']
+
+COMMUNE_NAMES = [entry[2] for entry in COMMUNES]
+
+# Codes INSEE (département 974) des communes du registre, pour rapprocher les données officielles.
+# Saint-Gilles-les-Bains fait partie de Saint-Paul : elle n'a pas de comptes propres.
+INSEE_CODES = {
+    '97401': 'Les Avirons', '97403': "L'Entre-Deux", '97404': "L'Étang-Salé", '97405': 'La Petite-Ile',
+    '97406': 'La Plaine des Palmistes', '97407': 'Le Port', '97408': 'La Possession', '97409': 'Saint-André',
+    '97410': 'Saint-Benoît', '97411': 'Saint-Denis', '97412': 'Saint-Joseph', '97413': 'Saint-Leu',
+    '97414': 'Saint-Louis', '97415': 'Saint-Paul', '97416': 'Saint-Pierre', '97417': 'Saint-Philippe',
+    '97418': 'Sainte-Marie', '97419': 'Sainte-Rose', '97420': 'Sainte-Suzanne', '97421': 'Salazie',
+    '97422': 'Le Tampon', '97423': 'Trois-Bassins', '97424': 'Cilaos',
+}
+
+
+def commune_entry(commune):
+    """Retourne l'entrée du registre pour un nom de commune ou de module"""
+    for entry in COMMUNES:
+        if commune in (entry[0], entry[2], entry[3]):
+            return entry
+    raise KeyError(f"Commune inconnue: {commune}")
+
+
+def load_analyzer(commune):
+    """Instancie l'analyseur d'une commune à partir de son script"""
+    module_name, class_name = commune_entry(commune)[:2]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)()
@@ -0,0 +1,179 @@
+import argparse
+import gzip
+import io
+import os
+import time
+import pandas as pd
+from communes import COMMUNES
+from panel import INDICATORS, IslandPanel
+
+# Colonnes entières (entiers nullables : une valeur manquante reste vide)
+INTEGER_COLUMNS = ['Annee', 'Run', 'Population', 'Menages']
+
+# Décimales par colonne : montants en M€ au millier d'euros, taux au centième de point
+PRECISION = {'Taux_Endettement': 4, 'Taux_Fiscalite': 4}
+DEFAULT_PRECISION = 3
+
+COMPRESSIONS = {'gzip': '.gz', 'zstd': '.zst', None: ''}
+
+
+def require_zstandard():
+    """Importe zstandard, dépendance facultative réservée à la compression zstd"""
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise ImportError("La compression zstd nécessite zstandard (pip install zstandard)") from exc
+    return zstandard
+
+
+def infer_compression(path):
+    """Compression déduite de l'extension du fichier"""
+    for compression, suffix in COMPRESSIONS.items():
+        if suffix and path.endswith(suffix):
+            return compression
+    return None
+
+
+def open_text(path, compression=None, level=None):
+    """Flux texte compressé au fil de l'écriture (rien n'est gardé en mémoire)"""
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=level or 6)
+    if compression == 'zstd':
+        zstandard = require_zstandard()
+        stream = zstandard.ZstdCompressor(level=level or 3).stream_writer(open(path, 'wb'), closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if compression is None:
+        return open(path, 'w', encoding='utf-8', newline='')
+    raise ValueError(f"Compression inconnue: {compression}")
+
+
+def compact_frame(df, precision=None, default=DEFAULT_PRECISION):
+    """Colonnes arrondies à leur précision et entiers typés ; le reste est inchangé"""
+    precision = {**PRECISION, **(precision or {})}
+    df = df.copy()
+    for column in df.columns:
+        if column in INTEGER_COLUMNS:
+            df[column] = df[column].round().astype('Int64')
+        elif pd.api.types.is_float_dtype(df[column]):
+            df[column] = df[column].round(precision.get(column, default))
+    return df
+
+
+class CompactCSVWriter:
+    """Écrit un CSV bloc par bloc dans un flux compressé, à précision fixée par colonne"""
+
+    def __init__(self, path, compression='infer', level=None, precision=None, default=DEFAULT_PRECISION):
+        self.path = path
+        self.compression = infer_compression(path) if compression == 'infer' else compression
+        self.precision = precision
+        self.default = default
+        self.stream = open_text(path, self.compression, level)
+        self.columns = None
+        self.rows = 0
+
+    def write(self, df):
+        """Ajoute un bloc ; l'en-tête est écrit avec le premier bloc et fixe l'ordre des colonnes"""
+        header = self.columns is None
+        if header:
+            self.columns = list(df.columns)
+        elif list(df.columns) != self.columns:
+            df = df.reindex(columns=self.columns)
+        compact_frame(df, self.precision, self.default).to_csv(self.stream, header=header, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        """Termine le flux compressé"""
+        self.stream.close()
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_compact(df, path, compression='infer', level=None, precision=None, chunksize=100_000):
+    """Écrit un DataFrame par blocs de chunksize lignes ; renvoie le chemin"""
+    with CompactCSVWriter(path, compression, level, precision) as writer:
+        for start in range(0, max(len(df), 1), chunksize):
+            writer.write(df.iloc[start:start + chunksize])
+    return path
+
+
+def ensemble_frames(n_runs, seed=0, start_year=2002, end_year=2025):
+    """Ensemble au format long, un run à la fois (mêmes graines que build_ensemble)"""
+    for run in range(n_runs):
+        panel = IslandPanel(seed=seed + run * len(COMMUNES), start_year=start_year, end_year=end_year).build()
+        df = panel.to_frame()
+        df.insert(0, 'Run', run)
+        yield df
+
+
+def benchmark(df, output_dir, compressions=('gzip', 'zstd'), repeat=3):
+    """Temps d'écriture et taille : to_csv actuel contre l'export compact, avec et sans compression"""
+    cases = [('to_csv', None, 'reference.csv'), ('compact', None, 'compact.csv')]
+    for compression in compressions:
+        if compression == 'zstd':
+            try:
+                require_zstandard()
+            except ImportError as exc:
+                print(f"⚠️ {exc}")
+                continue
+        cases.append(('compact', compression, f'compact.csv{COMPRESSIONS[compression]}'))
+
+    results = []
+    for method, compression, name in cases:
+        path = os.path.join(output_dir, name)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if method == 'to_csv':
+                df.to_csv(path, index=False)
+            else:
+                write_compact(df, path, compression)
+            timings.append(time.perf_counter() - start)
+        results.append({'export': method, 'compression': compression or '-', 'ms': min(timings) * 1000,
+                        'ko': os.path.getsize(path) / 1e3})
+    result = pd.DataFrame(results)
+    result['taille'] = result['ko'] / result['ko'].iloc[0]
+    return result
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Export CSV compact (précision fixée, entiers, compression)")
+    parser.add_argument('--output', default='reunion_ensemble.csv.gz',
+                        help="Fichier de sortie ; la compression suit l'extension (.gz, .zst)")
+    parser.add_argument('--runs', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--level', type=int, default=None, help="Niveau de compression")
+    parser.add_argument('--benchmark', action='store_true', help="Compare à to_csv sur l'ensemble")
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args()
+
+    print("🗜️ EXPORT CSV COMPACT")
+    print("=" * 60)
+
+    if args.benchmark:
+        os.makedirs(args.output_dir, exist_ok=True)
+        df = pd.concat(ensemble_frames(args.runs, args.seed), ignore_index=True)
+        print(f"📊 Ensemble de {args.runs} runs: {len(df)} lignes × {len(INDICATORS)} indicateurs")
+        result = benchmark(df, args.output_dir)
+        print(result.round({'ms': 1, 'ko': 1, 'taille': 3}).to_string(index=False))
+        return
+
+    # Ensemble écrit run par run : la mémoire est bornée par un run, pas par l'ensemble
+    start = time.perf_counter()
+    with CompactCSVWriter(args.output, level=args.level) as writer:
+        for df in ensemble_frames(args.runs, args.seed):
+            writer.write(df)
+    print(f"💾 {writer.rows} lignes ({args.runs} runs): {args.output} "
+          f"({os.path.getsize(args.output) / 1e3:.0f} ko, {time.perf_counter() - start:.1f}s)")
+    check = pd.read_csv(args.output, nrows=1000)
+    print(f"🔎 Relu par pandas: Annee {check['Annee'].dtype}, Population {check['Population'].dtype}, "
+          f"écart d'arrondi ≤ {10.0 ** -DEFAULT_PRECISION / 2:g} M€")
+
+
+if __name__ == "__main__":
+    main()
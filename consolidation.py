@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from communes import COMMUNES, EPCIS, commune_entry
+from panel import IslandPanel
+
+ISLAND = 'La Réunion'
+
+# Ratios consolidés par moyenne pondérée par la population, le reste est sommé
+RATIO_INDICATORS = ['Taux_Endettement', 'Taux_Fiscalite']
+
+
+class IslandConsolidator:
+    """Consolide les comptes communaux par EPCI et pour l'île entière"""
+
+    def __init__(self, panel):
+        self.panel = panel
+        self.groups = EPCIS + [ISLAND]
+        # Matrice d'appartenance groupes × communes (l'île regroupe toutes les communes)
+        self.membership = np.zeros((len(self.groups), len(panel.communes)))
+        for j, commune in enumerate(panel.communes):
+            self.membership[EPCIS.index(commune_entry(commune)[4]), j] = 1.0
+        self.membership[-1] = 1.0
+        self.ratio_mask = np.array([name in RATIO_INDICATORS for name in panel.indicators])
+        self._cache = None
+        self._cache_version = None
+
+    def consolidate(self, values=None):
+        """Consolide un tableau (..., communes, années, indicateurs) en une seule passe groupée"""
+        if values is None:
+            values = self.panel.values
+        population = values[..., self.panel.indicators.index('Population')]
+
+        # Les ratios sont pondérés par la population, les flux et stocks gardent un poids unitaire
+        weights = np.where(self.ratio_mask, population[..., None], 1.0)
+        totals = np.einsum('gc,...cyi->...gyi', self.membership, values * weights)
+        group_population = np.einsum('gc,...cy->...gy', self.membership, population)
+        return np.where(self.ratio_mask, totals / group_population[..., None], totals)
+
+    def results(self):
+        """Retourne la consolidation du panel, recalculée seulement si les communes ont changé"""
+        if self._cache is None or self._cache_version != self.panel.version:
+            self._cache = self.consolidate()
+            self._cache_version = self.panel.version
+        return self._cache
+
+    def to_frame(self, group):
+        """Retourne les comptes consolidés d'un groupe au format des scripts communaux"""
+        df = pd.DataFrame(self.results()[self.groups.index(group)], columns=self.panel.indicators)
+        df.insert(0, 'Annee', self.panel.years)
+        return df
+
+    def members(self, group):
+        """Liste des communes d'un groupe"""
+        return [c for j, c in enumerate(self.panel.communes) if self.membership[self.groups.index(group), j]]
+
+
+def group_slug(group):
+    """Préfixe de fichier d'un groupe consolidé"""
+    return 'la_reunion' if group == ISLAND else group.lower()
+
+
+def main():
+    """Fonction principale"""
+    print("🏝️ CONSOLIDATION DES COMPTES COMMUNAUX - ÎLE ET EPCI")
+    print("=" * 60)
+
+    panel = IslandPanel().build()
+    consolidator = IslandConsolidator(panel)
+
+    for group in consolidator.groups:
+        df = consolidator.to_frame(group)
+        output_file = f'{group_slug(group)}_consolidated_data_{panel.start_year}_{panel.end_year}.csv'
+        df.to_csv(output_file, index=False)
+        last = df.iloc[-1]
+        print(f"\n🏛️ {group} ({len(consolidator.members(group))} communes)")
+        print(f"Population {panel.end_year}: {last['Population']:.0f}")
+        print(f"Recettes totales {panel.end_year}: {last['Recettes_Totales']:.2f} M€")
+        print(f"Dette totale {panel.end_year}: {last['Dette_Totale']:.2f} M€")
+        print(f"Taux d'endettement {panel.end_year}: {last['Taux_Endettement'] * 100:.1f}%")
+        print(f"💾 Données sauvegardées: {output_file}")
+
+    print(f"\n✅ Consolidation terminée pour {len(COMMUNES)} communes")
+
+
+if __name__ == "__main__":
+    main()
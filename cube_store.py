@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+from communes import COMMUNES, EPCIS, commune_entry
+from panel import INDICATORS, IslandPanel
+
+CUBE_FILE = 'ensemble_cube'
+AXES = ['runs', 'communes', 'years', 'indicators']
+
+
+def cube_paths(path, version=None):
+    """Fichier de données .npy (une version par écriture) et sidecar JSON d'un cube"""
+    return (f'{path}.npy' if version is None else f'{path}.{version}.npy'), f'{path}.json'
+
+
+class CubeWriter:
+    """Écrit un cube runs × communes × années × indicateurs run par run, sans le garder en mémoire"""
+
+    def __init__(self, path, n_runs, communes=None, years=None, indicators=None, dtype='float64'):
+        self.path = path
+        self.communes = [commune_entry(c)[2] for c in communes] if communes else [c[2] for c in COMMUNES]
+        # Années par défaut : celles du panel, pas une plage recopiée ici
+        self.years = [int(y) for y in (IslandPanel(communes=self.communes).years if years is None else years)]
+        self.indicators = list(indicators or INDICATORS)
+        shape = (n_runs, len(self.communes), len(self.years), len(self.indicators))
+        # Chaque écriture a son propre fichier de données, désigné par le sidecar une fois complet
+        self.data_path, _ = cube_paths(path, f'{os.getpid()}-{time.time_ns()}')
+        self.tmp_path = f'{self.data_path}.tmp'
+        self.values = np.lib.format.open_memmap(self.tmp_path, mode='w+', dtype=dtype, shape=shape)
+
+    def write_run(self, run, values):
+        """Copie un run (communes × années × indicateurs) à sa place dans le fichier"""
+        self.values[run] = values
+
+    def close(self, attrs=None):
+        """Vide le cube sur disque puis le publie en remplaçant le sidecar, qui désigne les nouvelles données"""
+        _, meta_path = cube_paths(self.path)
+        self.values.flush()
+        sidecar = {'data': os.path.basename(self.data_path), 'shape': list(self.values.shape),
+                   'dtype': str(self.values.dtype), 'axes': AXES,
+                   'labels': {'runs': list(range(self.values.shape[0])), 'communes': self.communes,
+                              'years': self.years, 'indicators': self.indicators},
+                   'attrs': attrs or {}}
+        del self.values
+        # Données d'abord, sous un nom que l'ancien sidecar ne désigne pas : aucun lecteur ne peut
+        # associer les nouvelles données aux anciennes étiquettes, ni l'inverse
+        os.replace(self.tmp_path, self.data_path)
+        previous = read_sidecar(meta_path).get('data') if os.path.exists(meta_path) else None
+        with open(f'{meta_path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(sidecar, f, ensure_ascii=False, indent=2)
+        os.replace(f'{meta_path}.tmp', meta_path)
+        # Les lecteurs qui ont déjà ouvert l'ancienne version la gardent jusqu'à leur fermeture
+        if previous and previous != sidecar['data']:
+            try:
+                os.remove(os.path.join(os.path.dirname(meta_path), previous))
+            except FileNotFoundError:
+                pass
+        return self.data_path
+
+
+def read_sidecar(meta_path):
+    """Métadonnées d'un cube"""
+    with open(meta_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_cube(path, values, communes=None, years=None, indicators=None, attrs=None):
+    """Enregistre un cube déjà en mémoire"""
+    writer = CubeWriter(path, values.shape[0], communes, years, indicators, dtype=values.dtype)
+    writer.values[:] = values
+    return writer.close(attrs)
+
+
+class EnsembleCube:
+    """Cube ouvert en mémoire partagée : seules les pages lues sont chargées, via le cache du système"""
+
+    def __init__(self, path=CUBE_FILE):
+        default_path, meta_path = cube_paths(path)
+        for attempt in range(2):
+            self.meta = read_sidecar(meta_path)
+            data_name = self.meta.get('data', os.path.basename(default_path))
+            data_path = os.path.join(os.path.dirname(meta_path), data_name)
+            try:
+                # Lecture seule, sans copie : plusieurs processus partagent les mêmes pages
+                self.values = np.load(data_path, mmap_mode='r')
+                break
+            except FileNotFoundError:
+                # Version remplacée entre la lecture du sidecar et l'ouverture : on relit le sidecar
+                if attempt:
+                    raise
+        self.labels = self.meta['labels']
+        if list(self.values.shape) != self.meta['shape']:
+            raise ValueError(f"Le cube {data_path} ne correspond pas à son sidecar")
+
+    def _index(self, axis, labels):
+        """Positions des étiquettes demandées sur un axe (un EPCI vaut la liste de ses communes)"""
+        if labels is None:
+            return slice(None)
+        if axis == 'communes':
+            names = []
+            for label in labels:
+                names += [c[2] for c in COMMUNES if c[4] == label] if label in EPCIS else [commune_entry(label)[2]]
+            labels = names
+        return [self.labels[axis].index(label) for label in labels]
+
+    def select(self, runs=None, communes=None, years=None, indicators=None):
+        """Sous-cube étiqueté ; les axes non restreints restent des vues sans copie"""
+        selection = self.values
+        for axis, labels in enumerate([runs, communes, years, indicators]):
+            index = self._index(AXES[axis], labels)
+            if not isinstance(index, slice):
+                selection = np.take(selection, index, axis=axis)
+        return selection
+
+    def indicator(self, name):
+        """Vue runs × communes × années d'un indicateur"""
+        return self.values[..., self.labels['indicators'].index(name)]
+
+    def to_panel(self, run=0):
+        """IslandPanel d'un run, pour les outils qui travaillent sur un seul tirage"""
+        years = self.labels['years']
+        panel = IslandPanel(start_year=years[0], end_year=years[-1], communes=self.labels['communes'])
+        panel.values[:] = self.values[run]
+        panel.version += 1
+        return panel
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Cube d'ensemble en mémoire partagée")
+    parser.add_argument('--path', default=CUBE_FILE)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start-year', type=int, default=2002)
+    parser.add_argument('--end-year', type=int, default=2025)
+    args = parser.parse_args()
+
+    print("🧊 CUBE D'ENSEMBLE EN MÉMOIRE PARTAGÉE")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    writer = None
+    for run in range(args.runs):
+        # Mêmes graines que build_ensemble
+        panel = IslandPanel(seed=args.seed + run * len(COMMUNES), start_year=args.start_year,
+                            end_year=args.end_year).build()
+        if writer is None:
+            writer = CubeWriter(args.path, args.runs, panel.communes, panel.years)
+        writer.write_run(run, panel.values)
+    data_path = writer.close({'seed': args.seed})
+    print(f"💾 Cube écrit: {data_path} ({os.path.getsize(data_path) / 1e6:.1f} Mo, "
+          f"{time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    cube = EnsembleCube(args.path)
+    opened = time.perf_counter() - start
+    start = time.perf_counter()
+    years = [y for y in cube.labels['years'] if y >= 2015]
+    ratios = np.asarray(cube.select(communes=['CIREST'], years=years, indicators=['Taux_Endettement']))
+    print(f"📂 Ouverture: {opened * 1000:.2f} ms, forme {cube.values.shape}")
+    print(f"🔎 Taux d'endettement CIREST {years[0]}-{years[-1]}: {ratios.shape} en {(time.perf_counter() - start) * 1000:.2f} ms, "
+          f"médiane {np.median(ratios) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import argparse
+import os
+import time
+import numpy as np
+from communes import commune_entry
+from encode import ImageEncoder
+from headless import enable_headless
+from panel import IslandPanel, commune_ensemble, matches_run
+from plotting import (fan_chart, quantile_bands, set_fan_chart, set_stacked_bars, stacked_bars,
+                      update_band_limits, update_stack_limits)
+
+# Libellés des colonnes d'investissement sectoriel, tels qu'affichés par les scripts communaux
+SECTOR_LABELS = {
+    'Administratif': 'Administratif', 'Agricole': 'Agriculture', 'Agriculture': 'Agriculture',
+    'Commerce': 'Commerce', 'Culture': 'Culture', 'Education': 'Éducation',
+    'Environnement': 'Environnement', 'Equipements': 'Équipements', 'Industrie': 'Industrie',
+    'Infrastructures': 'Infrastructures', 'Logistique': 'Logistique', 'Maritime': 'Activités maritimes',
+    'Patrimoine': 'Patrimoine', 'Plage': 'Plage', 'Port': 'Port', 'Portuaire': 'Portuaire',
+    'Risques_Naturels': 'Risques Naturels', 'Routes': 'Routes', 'Sante': 'Santé', 'Social': 'Social',
+    'Tourisme': 'Tourisme', 'Tourisme_Vert': 'Tourisme Vert', 'Transport': 'Transport',
+    'Universite': 'Université', 'Urbanisme': 'Urbanisme', 'Voirie': 'Voirie',
+}
+
+SECTOR_COLORS = ['#264653', '#2A9D8F', '#E76F51', '#F9A602', '#6A0572', '#AB83A1']
+
+REVENUE_CATEGORIES = ['Impots_Locaux', 'Dotations_Etat', 'Autres_Recettes']
+REVENUE_LABELS = ['Impôts Locaux', 'Dotations État', 'Autres Recettes']
+EXPENSE_CATEGORIES = ['Fonctionnement', 'Investissement', 'Charge_Dette', 'Personnel']
+EXPENSE_LABELS = ['Fonctionnement', 'Investissement', 'Charge Dette', 'Personnel']
+STRUCTURE_COLORS = ['#264653', '#2A9D8F', '#E76F51', '#F9A602']
+
+# Panneaux du tableau de bord, dans l'ordre des scripts communaux (_plot_*)
+PANELS = ['revenue_expenses', 'revenue_structure', 'expenses_structure', 'investments',
+          'debt', 'performance_indicators', 'demography', 'sectorial_investments']
+
+# Colonnes tracées par panneau (les panneaux sectoriels dépendent de la commune)
+PANEL_COLUMNS = {
+    'revenue_expenses': ['Recettes_Totales', 'Depenses_Totales'],
+    'revenue_structure': REVENUE_CATEGORIES,
+    'expenses_structure': EXPENSE_CATEGORIES,
+    'debt': ['Dette_Totale', 'Taux_Endettement'],
+    'performance_indicators': ['Epargne_Brute', 'Taux_Fiscalite'],
+    'demography': ['Population', 'Menages'],
+}
+
+# Style appliqué aux tableaux de bord
+STYLE = 'seaborn-v0_8'
+
+
+def sector_columns(df):
+    """Colonnes d'investissement sectoriel d'une commune, dans l'ordre du script"""
+    return [c for c in df.columns if c.startswith('Investissement_')]
+
+
+def plotted_columns(df, panels=None):
+    """Colonnes effectivement tracées par un ensemble de panneaux"""
+    panels = panels or PANELS
+    columns = ['Annee']
+    for name in panels:
+        if name in ('investments', 'sectorial_investments'):
+            columns += sector_columns(df)
+        else:
+            columns += PANEL_COLUMNS[name]
+    return list(dict.fromkeys(columns))
+
+
+def sector_label(column):
+    """Libellé affiché d'une colonne d'investissement sectoriel"""
+    suffix = column[len('Investissement_'):]
+    return SECTOR_LABELS.get(suffix, suffix.replace('_', ' '))
+
+
+class DashboardTemplate:
+    """Tableau de bord construit une fois ; seules les données changent d'une commune à l'autre"""
+
+    def __init__(self, years, panels=None, max_sectors=6, figsize=(20, 24)):
+        import matplotlib.pyplot as plt
+
+        self.years = np.asarray(years)
+        self.panels = list(panels or PANELS)
+        self.max_sectors = max_sectors
+        self.sector_labels = None
+        plt.style.use(STYLE)
+        self.fig = plt.figure(figsize=figsize)
+        n_rows = (len(self.panels) + 1) // 2
+        n_cols = 1 if len(self.panels) == 1 else 2
+        self.axes = {name: self.fig.add_subplot(n_rows, n_cols, i + 1) for i, name in enumerate(self.panels)}
+        self.twins = {}
+        self.lines = {}
+        self.bars = {}
+        self.stacks = {}
+        self.stack_tops = {}
+        # Éventails de centiles (ensembles de Monte Carlo), masqués tant qu'aucune bande n'est fournie
+        self.fans = {}
+        self.fan_bands = {}
+        for name in self.panels:
+            getattr(self, f'_build_{name}')(self.axes[name])
+        self.title = self.fig.suptitle('', fontsize=16, fontweight='bold')
+        # Mise en page calculée une fois, en réservant une bande pour le titre
+        self.fig.tight_layout(rect=(0, 0, 1, 0.98))
+
+    def _line(self, ax, key, label, color, linewidth=2, alpha=0.8):
+        """Crée une courbe vide qui sera mise à jour par set_data, avec son éventail"""
+        self._fan(ax, key, color)
+        self.lines[key], = ax.plot(self.years, np.zeros(len(self.years)), label=label,
+                                   linewidth=linewidth, color=color, alpha=alpha)
+
+    def _fan(self, ax, key, color):
+        """Crée l'éventail de centiles d'une série, invisible par défaut"""
+        self.fans[key] = fan_chart(ax, self.years, None, color)
+        for collection in self.fans[key]:
+            collection.set_visible(False)
+
+    def _stack(self, ax, key, labels, colors):
+        """Crée la pile de barres : une PolyCollection par catégorie"""
+        self.stacks[key] = stacked_bars(ax, self.years, np.zeros((len(labels), len(self.years))),
+                                        labels, colors)
+
+    def _twin(self, ax, key, label, color, linewidth):
+        """Second axe avec sa courbe et une légende combinée"""
+        twin = ax.twinx()
+        self.twins[key] = twin
+        self._line(twin, key, label, color, linewidth=linewidth, alpha=0.8 if linewidth == 2 else 1)
+        twin.set_ylabel(label, color=color)
+        twin.tick_params(axis='y', labelcolor=color)
+        lines1, labels1 = ax.get_legend_handles_labels()
+        lines2, labels2 = twin.get_legend_handles_labels()
+        ax.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
+
+    def _build_revenue_expenses(self, ax):
+        """1. Évolution des recettes et dépenses"""
+        self._line(ax, 'Recettes_Totales', 'Recettes Totales', '#2A9D8F')
+        self._line(ax, 'Depenses_Totales', 'Dépenses Totales', '#E76F51')
+        ax.set_title('Évolution des Recettes et Dépenses (M€)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Montants (M€)')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    def _build_revenue_structure(self, ax):
+        """2. Structure des recettes"""
+        self._stack(ax, 'revenue', REVENUE_LABELS, STRUCTURE_COLORS)
+        ax.set_title('Structure des Recettes (M€)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Montants (M€)')
+        ax.legend()
+        ax.grid(True, alpha=0.3, axis='y')
+
+    def _build_expenses_structure(self, ax):
+        """3. Structure des dépenses"""
+        self._stack(ax, 'expenses', EXPENSE_LABELS, STRUCTURE_COLORS)
+        ax.set_title('Structure des Dépenses (M€)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Montants (M€)')
+        ax.legend()
+        ax.grid(True, alpha=0.3, axis='y')
+
+    def _build_investments(self, ax):
+        """4. Investissements communaux (colonnes sectorielles propres à chaque commune)"""
+        for k in range(self.max_sectors):
+            self._line(ax, f'sector_{k}', f'Secteur {k + 1}', SECTOR_COLORS[k % len(SECTOR_COLORS)])
+        ax.set_title('Répartition des Investissements (M€)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Montants (M€)')
+        ax.grid(True, alpha=0.3)
+
+    def _build_debt(self, ax):
+        """5. Dette et endettement"""
+        self.bars['debt'] = ax.bar(self.years, np.zeros(len(self.years)), label='Dette Totale (M€)',
+                                   color='#264653', alpha=0.7)
+        self._fan(ax, 'Dette_Totale', '#264653')
+        ax.set_title('Dette Communale et Taux d\'Endettement', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Dette (M€)', color='#264653')
+        ax.tick_params(axis='y', labelcolor='#264653')
+        ax.grid(True, alpha=0.3, axis='y')
+        self._twin(ax, 'Taux_Endettement', 'Taux d\'Endettement', '#E76F51', 3)
+
+    def _build_performance_indicators(self, ax):
+        """6. Indicateurs de performance"""
+        self.bars['savings'] = ax.bar(self.years, np.zeros(len(self.years)), label='Épargne Brute (M€)',
+                                      color='#2A9D8F', alpha=0.7)
+        ax.set_title('Indicateurs de Performance', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Épargne Brute (M€)', color='#2A9D8F')
+        ax.tick_params(axis='y', labelcolor='#2A9D8F')
+        ax.grid(True, alpha=0.3, axis='y')
+        self._twin(ax, 'Taux_Fiscalite', 'Taux de Fiscalité', '#F9A602', 3)
+
+    def _build_demography(self, ax):
+        """7. Démographie"""
+        self._line(ax, 'Population', 'Population', '#264653')
+        ax.set_title('Évolution Démographique', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Population', color='#264653')
+        ax.tick_params(axis='y', labelcolor='#264653')
+        ax.grid(True, alpha=0.3)
+        self._twin(ax, 'Menages', 'Ménages', '#E76F51', 2)
+
+    def _build_sectorial_investments(self, ax):
+        """8. Investissements sectoriels"""
+        self._stack(ax, 'sectors', [f'Secteur {k + 1}' for k in range(self.max_sectors)],
+                    [SECTOR_COLORS[k % len(SECTOR_COLORS)] for k in range(self.max_sectors)])
+        ax.set_title('Répartition Sectorielle des Investissements (M€)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Montants (M€)')
+        ax.grid(True, alpha=0.3, axis='y')
+
+    def _positions(self, df):
+        """Indices des années du DataFrame dans la grille d'années du modèle"""
+        return np.searchsorted(self.years, df['Annee'].to_numpy())
+
+    def _set_bars(self, container, positions, values, bottom=None):
+        """Met à jour les hauteurs d'un conteneur ; les années absentes ont une hauteur nulle"""
+        heights = np.zeros(len(self.years))
+        heights[positions] = values
+        bottoms = np.zeros(len(self.years)) if bottom is None else bottom
+        for rect, y, h in zip(container.patches, bottoms, heights):
+            rect.set_y(y)
+            rect.set_height(h)
+        return bottoms + heights
+
+    def _set_stack(self, key, df, positions, columns):
+        """Met à jour une pile de barres à partir des colonnes données"""
+        values = np.zeros((len(columns), len(self.years)))
+        values[:, positions] = df[columns].to_numpy().T
+        collections = self.stacks[key]
+        for k, collection in enumerate(collections):
+            collection.set_visible(k < len(columns))
+        self.stack_tops[key] = set_stacked_bars(collections[:len(columns)], self.years, values)
+
+    def _set_fans(self, bands, columns):
+        """Affiche les éventails des séries disposant de centiles {colonne: (5, années)}"""
+        self.fan_bands = {}
+        for key, collections in self.fans.items():
+            column = columns.get(key, key)
+            visible = bands is not None and column in bands and (key not in self.lines
+                                                                 or self.lines[key].get_visible())
+            for collection in collections:
+                collection.set_visible(visible)
+            if not visible:
+                continue
+            self.fan_bands[key] = bands[column]
+            set_fan_chart(collections, self.years, bands[column])
+            # La médiane de l'ensemble remplace la trajectoire d'un seul run
+            if key in self.lines:
+                self.lines[key].set_data(self.years, bands[column][2])
+            else:
+                self._set_bars(self.bars['debt'], np.arange(len(self.years)), bands[column][2])
+
+    def _set_sector_legends(self, columns):
+        """Recrée les légendes sectorielles seulement si les secteurs changent"""
+        labels = [sector_label(c) for c in columns]
+        if labels == self.sector_labels:
+            return
+        self.sector_labels = labels
+        if 'investments' in self.axes:
+            lines = [self.lines[f'sector_{k}'] for k in range(len(labels))]
+            self._set_legend(self.axes['investments'], lines, labels)
+        if 'sectorial_investments' in self.axes:
+            self._set_legend(self.axes['sectorial_investments'], self.stacks['sectors'][:len(labels)], labels)
+
+    def _set_legend(self, ax, handles, labels):
+        """Remplace la légende d'un axe (aucune légende sans secteur, ex. comptes consolidés)"""
+        if labels:
+            ax.legend(handles, labels)
+        elif ax.get_legend() is not None:
+            ax.get_legend().remove()
+
+    def update(self, df, title='', bands=None):
+        """Remplace les données affichées sans reconstruire la figure (bands : centiles facultatifs)"""
+        positions = self._positions(df)
+        years = df['Annee'].to_numpy()
+        for key in ('Recettes_Totales', 'Depenses_Totales', 'Taux_Endettement', 'Taux_Fiscalite',
+                    'Population', 'Menages'):
+            if key in self.lines:
+                self.lines[key].set_data(years, df[key].to_numpy())
+
+        if 'revenue' in self.stacks:
+            self._set_stack('revenue', df, positions, REVENUE_CATEGORIES)
+        if 'expenses' in self.stacks:
+            self._set_stack('expenses', df, positions, EXPENSE_CATEGORIES)
+
+        columns = sector_columns(df)[:self.max_sectors]
+        if 'investments' in self.axes:
+            for k in range(self.max_sectors):
+                line = self.lines[f'sector_{k}']
+                line.set_visible(k < len(columns))
+                if k < len(columns):
+                    line.set_data(years, df[columns[k]].to_numpy())
+        if 'sectors' in self.stacks:
+            self._set_stack('sectors', df, positions, columns)
+        self._set_sector_legends(columns)
+
+        if 'debt' in self.bars:
+            self._set_bars(self.bars['debt'], positions, df['Dette_Totale'].to_numpy())
+        if 'savings' in self.bars:
+            self._set_bars(self.bars['savings'], positions, df['Epargne_Brute'].to_numpy())
+
+        self._set_fans(bands, {f'sector_{k}': column for k, column in enumerate(columns)})
+
+        for ax in list(self.axes.values()) + list(self.twins.values()):
+            ax.relim(visible_only=True)
+        for key, tops in self.stack_tops.items():
+            update_stack_limits(self.stacks[key][0].axes, self.years, tops)
+        for key, fan in self.fan_bands.items():
+            update_band_limits(self.fans[key][0].axes, self.years, fan)
+        for ax in list(self.axes.values()) + list(self.twins.values()):
+            ax.autoscale_view()
+        self.title.set_text(title)
+
+    def save(self, path, dpi=300, bbox_inches='tight', **kwargs):
+        """Enregistre la figure courante"""
+        self.fig.savefig(path, dpi=dpi, bbox_inches=bbox_inches, **kwargs)
+
+    def close(self):
+        """Libère la figure"""
+        import matplotlib.pyplot as plt
+        plt.close(self.fig)
+
+
+def dashboard_title(commune, start_year, end_year):
+    """Titre du tableau de bord, identique à celui des scripts communaux"""
+    return f'Analyse des Comptes Communaux de {commune} ({start_year}-{end_year})'
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Rendu des tableaux de bord avec un modèle réutilisé")
+    parser.add_argument('communes', nargs='*', help="Communes à rendre (toutes par défaut)")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--runs', type=int, default=0, help="Runs d'ensemble pour les éventails de centiles")
+    parser.add_argument('--thumbnails', action='store_true',
+                        help="PNG optimisé et vignette WebP encodés en arrière-plan pendant le rendu suivant")
+    parser.add_argument('--palette', action='store_true',
+                        help="Avec --thumbnails, PNG réduit à 256 couleurs (plus léger, avec perte)")
+    args = parser.parse_args()
+    # Les barres viennent du panel et les médianes de l'ensemble : une même graine pour les deux
+    if args.runs and args.seed is None:
+        parser.error("--runs nécessite --seed (le panel et l'ensemble doivent partager la même graine)")
+
+    enable_headless()
+    print("🖼️ RENDU DES TABLEAUX DE BORD COMMUNAUX")
+    print("=" * 60)
+
+    communes = [commune_entry(c)[2] for c in args.communes] or None
+    panel = IslandPanel(seed=args.seed, communes=communes).build()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    template = DashboardTemplate(panel.years)
+    encoder = ImageEncoder(palette=args.palette) if args.thumbnails else None
+    print(f"🧱 Modèle construit en {time.perf_counter() - start:.2f}s")
+
+    for commune in panel.communes:
+        step = time.perf_counter()
+        bands = None
+        if args.runs:
+            ensemble = commune_ensemble(commune, args.runs, seed=args.seed,
+                                        start_year=panel.start_year, end_year=panel.end_year)
+            # Le panel tracé doit être le run 0 de l'ensemble qui l'ombre, y compris pour un sous-ensemble
+            if not matches_run(panel.frames[commune], ensemble):
+                raise RuntimeError(f"{commune}: le panel ne correspond pas au run 0 de l'ensemble "
+                                   f"(graine {args.seed})")
+            bands = quantile_bands(ensemble)
+        template.update(panel.frames[commune], dashboard_title(commune, panel.start_year, panel.end_year),
+                        bands=bands)
+        path = os.path.join(args.output_dir, f'{commune_entry(commune)[3]}_financial_analysis.png')
+        if encoder:
+            encoder.save(template.fig, path, dpi=args.dpi)
+        else:
+            template.save(path, dpi=args.dpi)
+        print(f"✅ {commune}: {path} ({time.perf_counter() - step:.2f}s)")
+    template.close()
+
+    if encoder:
+        print("\n🗜️ Encodage:")
+        for stat in encoder.close():
+            print(f"• {stat['path']}: {stat['bytes'] / 1e6:.2f} Mo en {stat['seconds']:.2f}s, "
+                  f"vignette {stat['thumbnail_bytes'] / 1e3:.0f} ko en {stat['thumbnail_seconds']:.2f}s")
+
+    print(f"\n⏱️ {len(panel.communes)} tableaux de bord en {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import multiprocessing
+import os
+import re
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from columnar import require_pyarrow
+from communes import COMMUNES, EPCIS, commune_entry
+from panel import INDICATORS, build_ensemble
+
+DATASET_DIR = 'panel_dataset'
+
+# Les répertoires préfixés par « _ » sont ignorés à la lecture : les écrivains y préparent leurs fichiers
+STAGING_DIR = '_staging'
+
+# Fichiers de données : runs-<premier run>-<dernier run>-<i>.parquet
+RUNS_FILE = re.compile(r'^runs-(\d+)-(\d+)-\d+\.parquet$')
+
+
+def resolve_communes(communes):
+    """Noms de communes ou d'EPCI -> identifiants de partition (slugs)"""
+    slugs = []
+    for name in communes:
+        if name in EPCIS:
+            slugs += [c[3] for c in COMMUNES if c[4] == name]
+        else:
+            slugs.append(commune_entry(name)[3])
+    return slugs
+
+
+class PanelDataset:
+    """Jeu de données Parquet partitionné scenario=/commune=/annee= (style Hive)"""
+
+    def __init__(self, root=DATASET_DIR):
+        self.root = root
+
+    def partitioning(self):
+        """Schéma des clés de partition"""
+        pa = require_pyarrow()
+        import pyarrow.dataset as ds
+        return ds.partitioning(pa.schema([('scenario', pa.string()), ('commune', pa.string()),
+                                          ('annee', pa.int16())]), flavor='hive')
+
+    def to_table(self, values, scenario, communes=None, years=None, first_run=0):
+        """Table longue d'un ensemble (runs, communes, années, indicateurs) : une ligne par run, commune et année"""
+        pa = require_pyarrow()
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 3:
+            values = values[None]
+        n_runs, n_communes, n_years, _ = values.shape
+        communes = [commune_entry(c)[3] for c in communes] if communes else [c[3] for c in COMMUNES]
+        years = np.arange(2002, 2002 + n_years) if years is None else np.asarray(years)
+        columns = {
+            'scenario': pa.array(np.full(values[..., 0].size, scenario)),
+            'commune': pa.array(np.tile(np.repeat(communes, n_years), n_runs)),
+            'annee': pa.array(np.tile(years, n_runs * n_communes).astype(np.int16)),
+            'run': pa.array(np.repeat(np.arange(first_run, first_run + n_runs, dtype=np.int32),
+                                      n_communes * n_years)),
+        }
+        flat = values.reshape(-1, len(INDICATORS))
+        columns.update({name: pa.array(flat[:, k]) for k, name in enumerate(INDICATORS)})
+        return pa.table(columns)
+
+    def write(self, values, scenario, communes=None, years=None, first_run=0):
+        """Écrit un lot de runs, un fichier par partition ; réécrire ces runs remplace leurs fichiers"""
+        require_pyarrow()
+        import pyarrow.dataset as ds
+
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 3:
+            values = values[None]
+        last_run = first_run + len(values) - 1
+        staging = os.path.join(self.root, STAGING_DIR, f'{os.getpid()}-{uuid.uuid4().hex}')
+        # Nom fixé par l'intervalle de runs : le même lot réécrit remplace ses fichiers par os.replace
+        ds.write_dataset(self.to_table(values, scenario, communes, years, first_run), staging, format='parquet',
+                         partitioning=self.partitioning(),
+                         basename_template=f'runs-{first_run:05d}-{last_run:05d}-{{i}}.parquet',
+                         existing_data_behavior='overwrite_or_ignore')
+        # Préparation à part + renommage atomique : un lecteur ne voit jamais de fichier partiel
+        count = 0
+        for directory, _, files in os.walk(staging):
+            target = os.path.join(self.root, os.path.relpath(directory, staging))
+            if not files:
+                continue
+            os.makedirs(target, exist_ok=True)
+            stale = self._stale_files(target, first_run, last_run, set(files))
+            for name in files:
+                os.replace(os.path.join(directory, name), os.path.join(target, name))
+                count += 1
+            # Fichiers d'un découpage précédent couvrant seulement des runs réécrits
+            for name in stale:
+                os.remove(os.path.join(target, name))
+        shutil.rmtree(staging, ignore_errors=True)
+        return count
+
+    def _stale_files(self, directory, first_run, last_run, keep):
+        """Fichiers d'une partition dont tous les runs sont réécrits ; refuse un chevauchement partiel"""
+        stale = []
+        for name in os.listdir(directory):
+            match = RUNS_FILE.match(name)
+            if not match or name in keep:
+                continue
+            first, last = int(match.group(1)), int(match.group(2))
+            if first_run <= first and last <= last_run:
+                stale.append(name)
+            elif first <= last_run and first_run <= last:
+                raise ValueError(f"{os.path.join(directory, name)} contient les runs {first}-{last}, "
+                                 f"en partie seulement dans le lot {first_run}-{last_run}")
+        return stale
+
+    def dataset(self):
+        """Vue pyarrow du jeu de données (découverte des fichiers et des partitions)"""
+        require_pyarrow()
+        import pyarrow.dataset as ds
+        return ds.dataset(self.root, format='parquet', partitioning=self.partitioning())
+
+    def filter(self, scenario=None, communes=None, start_year=None, end_year=None, runs=None):
+        """Prédicat pyarrow ; les conditions sur les clés de partition élaguent les fichiers"""
+        require_pyarrow()
+        import pyarrow.dataset as ds
+
+        conditions = []
+        if scenario is not None:
+            conditions.append(ds.field('scenario') == scenario)
+        if communes:
+            conditions.append(ds.field('commune').isin(resolve_communes(communes)))
+        if start_year is not None:
+            conditions.append(ds.field('annee') >= start_year)
+        if end_year is not None:
+            conditions.append(ds.field('annee') <= end_year)
+        if runs is not None:
+            conditions.append(ds.field('run').isin(list(runs)))
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def query(self, columns=None, **filters):
+        """Lit seulement les fichiers et colonnes nécessaires ; renvoie un DataFrame long"""
+        columns = ['scenario', 'commune', 'annee', 'run'] + [c for c in (columns or INDICATORS)]
+        table = self.dataset().to_table(columns=columns, filter=self.filter(**filters))
+        return table.to_pandas()
+
+    def files_touched(self, **filters):
+        """Nombre de fichiers lus par une requête et nombre total de fichiers"""
+        dataset = self.dataset()
+        return len(list(dataset.get_fragments(filter=self.filter(**filters)))), len(dataset.files)
+
+
+def write_runs(root, scenario, n_runs, seed, first_run):
+    """Génère et écrit un lot de runs (exécuté dans un processus de travail)"""
+    values = build_ensemble(n_runs, seed=seed + first_run * len(COMMUNES))
+    return PanelDataset(root).write(values, scenario, first_run=first_run)
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Jeu de données partitionné des ensembles")
+    parser.add_argument('--root', default=DATASET_DIR)
+    parser.add_argument('--scenarios', default='central', help="Scénarios séparés par des virgules")
+    parser.add_argument('--runs', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=2, help="Runs par écrivain")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("🗂️ JEU DE DONNÉES PARTITIONNÉ DES ENSEMBLES")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    # Écrivains concurrents : chaque processus écrit un fichier par partition pour son lot de runs
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [executor.submit(write_runs, args.root, scenario, min(args.batch, args.runs - first), args.seed,
+                                   first)
+                   for scenario in args.scenarios.split(',') for first in range(0, args.runs, args.batch)]
+        files = sum(future.result() for future in futures)
+    print(f"✍️ {files} fichiers écrits en {time.perf_counter() - start:.2f}s")
+
+    store = PanelDataset(args.root)
+    query = {'scenario': args.scenarios.split(',')[0], 'communes': ['CIREST'], 'start_year': 2015,
+             'end_year': 2025}
+    start = time.perf_counter()
+    df = store.query(['Taux_Endettement'], **query)
+    elapsed = time.perf_counter() - start
+    touched, total = store.files_touched(**query)
+    print(f"🔎 Taux d'endettement CIREST 2015-2025: {len(df)} lignes en {elapsed * 1000:.0f} ms, "
+          f"{touched}/{total} fichiers lus")
+    print(df.groupby('commune')['Taux_Endettement'].agg(['mean', 'min', 'max']).round(3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def render_rgba(fig, dpi=300, tight=True, pad_inches=0.1):
+    """Rend la figure une seule fois et renvoie une copie du tampon RGBA (recadré comme bbox_inches='tight')"""
+    original_dpi = fig.dpi
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    rgba = np.asarray(fig.canvas.buffer_rgba())
+    if tight:
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(pad_inches)
+        height = rgba.shape[0]
+        x0, x1 = max(int(bbox.x0 * dpi), 0), min(int(np.ceil(bbox.x1 * dpi)), rgba.shape[1])
+        y0, y1 = max(height - int(np.ceil(bbox.y1 * dpi)), 0), min(height - int(bbox.y0 * dpi), height)
+        rgba = rgba[y0:y1, x0:x1]
+    # Copie : le tampon du canevas est réécrit par le rendu suivant
+    rgba = rgba.copy()
+    fig.set_dpi(original_dpi)
+    return rgba
+
+
+def write_image(rgba, path, fmt='png', compress_level=6):
+    """Encode un tampon RGBA déjà rendu (PNG sans perte, ou format sans transparence en RGB)"""
+    from PIL import Image
+
+    image = Image.fromarray(rgba)
+    if fmt.lower() == 'png':
+        image.save(path, 'PNG', compress_level=compress_level)
+    else:
+        image.convert('RGB').save(path, fmt.upper())
+    return path
+
+
+class ImageEncoder:
+    """Encode en arrière-plan une image pleine résolution et sa vignette à partir du même tampon RGBA"""
+
+    def __init__(self, workers=2, compress_level=9, optimize=True, palette=False, thumbnail_width=480,
+                 thumbnail_format='webp', quality=80):
+        from PIL import features
+
+        # PNG sans perte par défaut : compression maximale et recherche des meilleurs filtres
+        self.compress_level = compress_level
+        self.optimize = optimize
+        # Palette de 256 couleurs sur demande : environ deux fois plus léger, mais dégrade les
+        # éventails semi-transparents et le texte lissé
+        self.palette = palette
+        self.thumbnail_width = thumbnail_width
+        if thumbnail_format == 'webp' and not features.check('webp'):
+            thumbnail_format = 'jpeg'
+        self.thumbnail_format = thumbnail_format
+        self.quality = quality
+        self.executor = ThreadPoolExecutor(workers)
+        self.futures = []
+        self.stats = []
+
+    def thumbnail_path(self, path):
+        """Chemin de la vignette associée à une image"""
+        extension = 'jpg' if self.thumbnail_format == 'jpeg' else self.thumbnail_format
+        return f'{os.path.splitext(path)[0]}_thumb.{extension}'
+
+    def _encode(self, rgba, path):
+        """Écrit le PNG et la vignette (exécuté dans un fil du pool)"""
+        from PIL import Image
+
+        start = time.perf_counter()
+        image = Image.fromarray(rgba).convert('RGB')
+        full = image.quantize(256, method=Image.Quantize.FASTOCTREE) if self.palette else image
+        full.save(path, 'PNG', compress_level=self.compress_level, optimize=self.optimize)
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        thumbnail_path = self.thumbnail_path(path)
+        thumbnail = image.resize((self.thumbnail_width, round(image.height * self.thumbnail_width / image.width)),
+                                 Image.LANCZOS, reducing_gap=3.0)
+        thumbnail.save(thumbnail_path, self.thumbnail_format.upper(), quality=self.quality)
+        stat = {'path': path, 'bytes': os.path.getsize(path), 'seconds': full_seconds,
+                'thumbnail_path': thumbnail_path, 'thumbnail_bytes': os.path.getsize(thumbnail_path),
+                'thumbnail_seconds': time.perf_counter() - start}
+        self.stats.append(stat)
+        return stat
+
+    def submit(self, rgba, path):
+        """Met l'encodage en file ; le rendu suivant peut commencer aussitôt"""
+        future = self.executor.submit(self._encode, rgba, path)
+        self.futures.append(future)
+        return future
+
+    def save(self, fig, path, dpi=300):
+        """Rend la figure dans le fil courant puis délègue l'encodage au pool"""
+        return self.submit(render_rgba(fig, dpi), path)
+
+    def close(self):
+        """Attend la fin des encodages en cours ; renvoie leurs statistiques"""
+        for future in self.futures:
+            future.result()
+        self.executor.shutdown()
+        return self.stats
@@ -0,0 +1,14 @@
+import os
+import sys
+
+
+def is_headless():
+    """Mode sans affichage : option --headless ou variable COMPTES_HEADLESS=1"""
+    return '--headless' in sys.argv or os.environ.get('COMPTES_HEADLESS') == '1'
+
+
+def enable_headless():
+    """Force un backend non interactif pour tout le processus (serveur, cron, processus de travail)"""
+    os.environ['COMPTES_HEADLESS'] = '1'
+    import matplotlib
+    matplotlib.use('Agg', force=True)
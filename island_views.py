@@ -0,0 +1,144 @@
+import argparse
+import os
+import time
+import numpy as np
+from benchmark import LABELS, CommuneBenchmark
+from headless import enable_headless
+from panel import IslandPanel, build_ensemble
+
+
+def ensemble_quantiles(benchmark, ensemble, quantiles=(5, 25, 50, 75, 95), per_capita=True):
+    """Centiles d'un ensemble (runs, communes, années, indicateurs), bruts ou par habitant"""
+    values = benchmark.per_capita(ensemble) if per_capita else ensemble
+    return np.percentile(values, quantiles, axis=0)
+
+
+class IslandViews:
+    """Vues comparatives des 24 communes dessinées avec des collections"""
+
+    def __init__(self, panel):
+        self.panel = panel
+        self.benchmark = CommuneBenchmark(panel)
+
+    def _values(self, indicator, per_capita):
+        """Tranche communes × années d'un indicateur, brute ou par habitant"""
+        values = self.benchmark.per_capita(self.panel.values) if per_capita else self.panel.values
+        return values[:, :, self.panel.indicators.index(indicator)]
+
+    def small_multiples(self, indicator, per_capita=True, bands=None, figsize=(16, 20)):
+        """Grille 6×4 : une commune par axe, les 23 autres en fond dans une seule LineCollection"""
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import LineCollection
+
+        values = self._values(indicator, per_capita)
+        years = self.panel.years
+        segments = np.stack([np.broadcast_to(years, values.shape), values], axis=-1)
+        n_communes = len(self.panel.communes)
+        n_cols = 4
+        n_rows = -(-n_communes // n_cols)
+
+        plt.style.use('seaborn-v0_8')
+        fig, axes = plt.subplots(n_rows, n_cols, figsize=figsize, sharex=True, sharey=True)
+        axes = axes.ravel()
+        for i, commune in enumerate(self.panel.communes):
+            ax = axes[i]
+            ax.add_collection(LineCollection(np.delete(segments, i, axis=0), colors='#AAAAAA',
+                                             linewidths=0.8, alpha=0.6))
+            if bands is not None:
+                # Bandes de l'ensemble : deux PolyCollection par axe, quel que soit le nombre de runs
+                k = self.panel.indicators.index(indicator)
+                ax.fill_between(years, bands[0, i, :, k], bands[-1, i, :, k], color='#2A9D8F', alpha=0.2,
+                                linewidth=0)
+                ax.fill_between(years, bands[1, i, :, k], bands[-2, i, :, k], color='#2A9D8F', alpha=0.35,
+                                linewidth=0)
+            ax.plot(years, values[i], color='#E76F51', linewidth=2)
+            ax.set_title(commune, fontsize=10, fontweight='bold')
+            ax.grid(True, alpha=0.3)
+        for ax in axes[n_communes:]:
+            ax.set_visible(False)
+        axes[0].autoscale_view()
+
+        label = LABELS[indicator] if per_capita else indicator.replace('_', ' ')
+        fig.suptitle(f'{label[0].upper() + label[1:]} - communes de La Réunion '
+                     f'({self.panel.start_year}-{self.panel.end_year})', fontsize=16, fontweight='bold')
+        # Marges fixes : tight_layout sur 24 axes coûte plus que le tracé lui-même
+        fig.subplots_adjust(left=0.05, right=0.98, bottom=0.03, top=0.95, hspace=0.3, wspace=0.08)
+        return fig
+
+    def heatmap(self, indicators=None, figsize=(16, 20)):
+        """Carte de chaleur indicateur × commune × année : une image par indicateur"""
+        import matplotlib.pyplot as plt
+
+        indicators = indicators or self.panel.indicators
+        normalized = self.benchmark.per_capita(self.panel.values)
+        n_cols = 3
+        n_rows = -(-len(indicators) // n_cols)
+
+        plt.style.use('seaborn-v0_8')
+        fig, axes = plt.subplots(n_rows, n_cols, figsize=figsize, sharex=True, sharey=True)
+        axes = axes.ravel()
+        extent = (self.panel.start_year - 0.5, self.panel.end_year + 0.5, len(self.panel.communes) - 0.5, -0.5)
+        for ax, indicator in zip(axes, indicators):
+            values = normalized[:, :, self.panel.indicators.index(indicator)]
+            # Écart à la moyenne insulaire de l'année, en écarts-types
+            z = (values - values.mean(0)) / np.where(values.std(0) > 0, values.std(0), 1.0)
+            ax.imshow(z, aspect='auto', cmap='RdBu_r', vmin=-2.5, vmax=2.5, extent=extent,
+                      interpolation='nearest')
+            ax.set_title(LABELS[indicator][0].upper() + LABELS[indicator][1:], fontsize=10, fontweight='bold')
+            ax.grid(False)
+            ax.tick_params(axis='y', labelsize=7)
+        axes[0].set_yticks(range(len(self.panel.communes)))
+        axes[0].set_yticklabels(self.panel.communes)
+        for ax in axes[len(indicators):]:
+            ax.set_visible(False)
+        fig.suptitle('Position des communes par rapport à la moyenne insulaire (écarts-types)',
+                     fontsize=16, fontweight='bold')
+        fig.subplots_adjust(left=0.12, right=0.98, bottom=0.03, top=0.95, hspace=0.25, wspace=0.05)
+        return fig
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Petits multiples et carte de chaleur des 24 communes")
+    parser.add_argument('--indicator', default='Dette_Totale')
+    parser.add_argument('--raw', action='store_true', help="Valeurs brutes plutôt que par habitant")
+    parser.add_argument('--heatmap', action='store_true')
+    parser.add_argument('--runs', type=int, default=0, help="Runs d'ensemble pour les bandes de centiles")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=60)
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args()
+    # Les lignes viennent du panel et les bandes de l'ensemble : une même graine pour les deux
+    if args.runs and args.seed is None:
+        parser.error("--runs nécessite --seed (le panel et l'ensemble doivent partager la même graine)")
+
+    enable_headless()
+    import matplotlib.pyplot as plt
+
+    print("🗺️ VUES COMPARATIVES DES COMMUNES DE LA RÉUNION")
+    print("=" * 60)
+
+    panel = IslandPanel(seed=args.seed).build()
+    os.makedirs(args.output_dir, exist_ok=True)
+    views = IslandViews(panel)
+    bands = None
+    if args.runs:
+        print(f"🎲 Génération d'un ensemble de {args.runs} runs...")
+        # Même échelle que les lignes : bandes en M€ avec --raw
+        bands = ensemble_quantiles(views.benchmark, build_ensemble(args.runs, seed=args.seed),
+                                   per_capita=not args.raw)
+
+    start = time.perf_counter()
+    if args.heatmap:
+        fig = views.heatmap()
+        output_file = os.path.join(args.output_dir, 'island_heatmap.png')
+    else:
+        fig = views.small_multiples(args.indicator, per_capita=not args.raw, bands=bands)
+        output_file = os.path.join(args.output_dir, f'island_small_multiples_{args.indicator.lower()}.png')
+    fig.savefig(output_file, dpi=args.dpi, bbox_inches='tight')
+    plt.close(fig)
+    print(f"💾 Figure sauvegardée: {output_file} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
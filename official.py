@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from columnar import require_pyarrow
+from communes import INSEE_CODES, commune_entry
+from panel import INDICATORS, IslandPanel
+
+DEPARTMENT = '974'
+CACHE_DIR = '.official_cache'
+
+# Export OFGL « comptes individuels des communes » (format long : une ligne par agrégat).
+# Les en-têtes changent avec le millésime du code officiel géographique : ils sont repérés par motif.
+# Les libellés d'agrégats sont à vérifier sur l'export utilisé ; un fichier JSON peut les remplacer (--mapping).
+OFGL_MAPPING = {
+    'layout': 'long',
+    'separator': ';',
+    'decimal': '.',
+    'encoding': 'utf-8',
+    'scale': 1e-6,
+    'columns': {
+        'year': r'^(Exercice|exer)$',
+        'department': r'^(Code Insee \d{4} Département|dep_code)$',
+        'insee': r'^(Code Insee \d{4} Commune|insee)$',
+        'aggregate': r'^(Agrégat|agregat)$',
+        'amount': r'^(Montant|montant)$',
+        'population': r'^(Population totale|ptot)$',
+    },
+    'aggregates': {
+        'Recettes totales': 'Recettes_Totales',
+        'Impôts locaux': 'Impots_Locaux',
+        'Dotation globale de fonctionnement': 'Dotations_Etat',
+        'Dépenses totales': 'Depenses_Totales',
+        'Dépenses de fonctionnement': 'Fonctionnement',
+        "Dépenses d'investissement": 'Investissement',
+        'Charges financières': 'Charge_Dette',
+        'Frais de personnel': 'Personnel',
+        'Epargne brute': 'Epargne_Brute',
+        'Encours de dette': 'Dette_Totale',
+    },
+}
+
+
+def load_mapping(path):
+    """Correspondance lue depuis un fichier JSON, complétée par les valeurs OFGL par défaut"""
+    with open(path, encoding='utf-8') as f:
+        mapping = json.load(f)
+    return {**OFGL_MAPPING, **mapping}
+
+
+class OfficialAccountsLoader:
+    """Lecture par blocs d'un export national, filtrée sur les communes de La Réunion"""
+
+    def __init__(self, mapping=None, chunksize=200_000, cache_dir=CACHE_DIR):
+        self.mapping = mapping or OFGL_MAPPING
+        self.chunksize = chunksize
+        self.cache_dir = cache_dir
+        self.stats = {'chunks': 0, 'rows_read': 0, 'rows_kept': 0, 'cached': False}
+
+    def resolve_columns(self, path):
+        """Noms réels des colonnes utiles, repérés par motif dans l'en-tête"""
+        header = pd.read_csv(path, sep=self.mapping['separator'], encoding=self.mapping['encoding'], nrows=0)
+        resolved = {}
+        for role, pattern in self.mapping['columns'].items():
+            matches = [column for column in header.columns if re.match(pattern, column.strip())]
+            if matches:
+                resolved[role] = matches[0]
+        if self.mapping['layout'] == 'wide':
+            missing = [column for column in self.mapping['fields'] if column not in header.columns]
+            if missing:
+                raise KeyError(f"Colonnes absentes de {path}: {', '.join(missing)}")
+        required = ['year', 'insee'] + (['aggregate', 'amount'] if self.mapping['layout'] == 'long' else [])
+        missing = [role for role in required if role not in resolved]
+        if missing:
+            raise KeyError(f"Colonnes introuvables dans {path}: {', '.join(missing)}")
+        return resolved
+
+    def chunks(self, path):
+        """Blocs filtrés sur le département 974 ; la mémoire reste bornée par la taille d'un bloc"""
+        columns = self.resolve_columns(path)
+        usecols = list(columns.values())
+        if self.mapping['layout'] == 'wide':
+            usecols += list(self.mapping['fields'])
+        # Codes et libellés en texte : « 974 » et « 97411 » ne doivent pas devenir des nombres
+        text = {columns[role]: str for role in ('department', 'insee', 'aggregate') if role in columns}
+        reader = pd.read_csv(path, sep=self.mapping['separator'], encoding=self.mapping['encoding'],
+                             decimal=self.mapping['decimal'], usecols=usecols, dtype=text,
+                             chunksize=self.chunksize)
+        for chunk in reader:
+            self.stats['chunks'] += 1
+            self.stats['rows_read'] += len(chunk)
+            insee = chunk[columns['insee']].str.strip().str.zfill(5)
+            keep = insee.isin(INSEE_CODES.keys())
+            if 'department' in columns:
+                keep &= chunk[columns['department']].str.strip().str.lstrip('0') == DEPARTMENT
+            if self.mapping['layout'] == 'long':
+                keep &= chunk[columns['aggregate']].str.strip().isin(self.mapping['aggregates'].keys())
+            if keep.any():
+                filtered = chunk[keep].rename(columns={name: role for role, name in columns.items()})
+                filtered['insee'] = insee[keep]
+                self.stats['rows_kept'] += len(filtered)
+                yield filtered
+
+    def to_project_columns(self, rows):
+        """Lignes officielles filtrées -> une ligne par commune et par année, colonnes du projet"""
+        scale = self.mapping['scale']
+        if self.mapping['layout'] == 'long':
+            rows = rows.assign(column=rows['aggregate'].str.strip().map(self.mapping['aggregates']))
+            df = rows.pivot_table(index=['insee', 'year'], columns='column', values='amount', aggfunc='sum') * scale
+            if 'population' in rows:
+                df['Population'] = rows.groupby(['insee', 'year'])['population'].first()
+        else:
+            df = rows.set_index(['insee', 'year'])[list(self.mapping['fields'])]
+            df = df.rename(columns=self.mapping['fields']) * scale
+            if 'population' in rows:
+                df['Population'] = rows.set_index(['insee', 'year'])['population']
+        df = df.reset_index()
+        df.insert(0, 'Commune', df.pop('insee').map(INSEE_CODES))
+        df = df.rename(columns={'year': 'Annee'})
+        df['Annee'] = df['Annee'].astype(int)
+
+        # Indicateurs dérivés quand l'export ne les fournit pas directement
+        if 'Autres_Recettes' not in df and {'Recettes_Totales', 'Impots_Locaux', 'Dotations_Etat'} <= set(df):
+            df['Autres_Recettes'] = df['Recettes_Totales'] - df['Impots_Locaux'] - df['Dotations_Etat']
+        if 'Taux_Endettement' not in df and {'Dette_Totale', 'Recettes_Totales'} <= set(df):
+            df['Taux_Endettement'] = df['Dette_Totale'] / df['Recettes_Totales']
+        for column in INDICATORS:
+            if column not in df:
+                df[column] = np.nan
+        return df[['Commune', 'Annee'] + INDICATORS].sort_values(['Commune', 'Annee']).reset_index(drop=True)
+
+    def cache_path(self, path):
+        """Cache colonnaire propre au fichier source (taille, date) et à la correspondance"""
+        status = os.stat(path)
+        digest = hashlib.sha256(json.dumps([os.path.abspath(path), status.st_size, status.st_mtime_ns,
+                                            self.mapping], sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest[:16]}.parquet')
+
+    def load(self, path):
+        """Comptes officiels des communes de La Réunion, depuis le cache s'il est à jour"""
+        require_pyarrow()
+        cached = self.cache_path(path)
+        if os.path.exists(cached):
+            self.stats['cached'] = True
+            return pd.read_parquet(cached)
+        parts = list(self.chunks(path))
+        if not parts:
+            raise ValueError(f"Aucune ligne du département {DEPARTMENT} dans {path}")
+        df = self.to_project_columns(pd.concat(parts, ignore_index=True))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{cached}.{os.getpid()}.tmp'
+        df.to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, cached)
+        return df
+
+
+def official_panel(df):
+    """IslandPanel rempli avec les comptes officiels (indicateurs manquants en NaN)"""
+    communes = [c for c in INSEE_CODES.values() if c in set(df['Commune'])]
+    panel = IslandPanel(start_year=int(df['Annee'].min()), end_year=int(df['Annee'].max()), communes=communes)
+    for commune, frame in df.groupby('Commune', sort=False):
+        panel.set_commune(commune_entry(commune)[2], frame.drop(columns='Commune').reset_index(drop=True))
+    return panel
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Import des comptes officiels des communes de La Réunion")
+    parser.add_argument('source', help="Export national OFGL/DGFiP (CSV, éventuellement compressé)")
+    parser.add_argument('--mapping', default=None, help="Correspondance JSON colonnes officielles -> projet")
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--output', default='reunion_official_accounts.csv')
+    args = parser.parse_args()
+
+    print("🏛️ IMPORT DES COMPTES OFFICIELS - DÉPARTEMENT 974")
+    print("=" * 60)
+
+    mapping = load_mapping(args.mapping) if args.mapping else None
+    loader = OfficialAccountsLoader(mapping, chunksize=args.chunksize, cache_dir=args.cache_dir)
+    start = time.perf_counter()
+    df = loader.load(args.source)
+    elapsed = time.perf_counter() - start
+
+    stats = loader.stats
+    if stats['cached']:
+        print(f"🗃️ Cache à jour: {loader.cache_path(args.source)} ({elapsed * 1000:.0f} ms)")
+    else:
+        print(f"📖 {stats['rows_read']} lignes lues en {stats['chunks']} blocs, {stats['rows_kept']} retenues "
+              f"({elapsed:.1f}s)")
+    df.to_csv(args.output, index=False)
+    print(f"💾 {df['Commune'].nunique()} communes, {df['Annee'].min()}-{df['Annee'].max()}: {args.output}")
+    missing = [c for c in INDICATORS if df[c].isna().all()]
+    if missing:
+        print(f"⚠️ Indicateurs absents de l'export: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
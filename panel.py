@@ -0,0 +1,122 @@
+import argparse
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+from communes import COMMUNES, commune_entry, load_analyzer
+
+# Indicateurs communs aux 24 communes (les investissements sectoriels varient d'une commune à l'autre)
+INDICATORS = ['Population', 'Menages',
+              'Recettes_Totales', 'Impots_Locaux', 'Dotations_Etat', 'Autres_Recettes',
+              'Depenses_Totales', 'Fonctionnement', 'Investissement', 'Charge_Dette', 'Personnel',
+              'Epargne_Brute', 'Dette_Totale', 'Taux_Endettement', 'Taux_Fiscalite']
+
+
+class IslandPanel:
+    """Panel insulaire : tableau communes × années × indicateurs"""
+
+    def __init__(self, seed=None, start_year=2002, end_year=2025, communes=None):
+        self.seed = seed
+        self.start_year = start_year
+        self.end_year = end_year
+        self.communes = [commune_entry(c)[2] for c in communes] if communes else [c[2] for c in COMMUNES]
+        self.years = np.arange(start_year, end_year + 1)
+        self.indicators = list(INDICATORS)
+        self.values = np.full((len(self.communes), len(self.years), len(self.indicators)), np.nan)
+        self.frames = {}
+        # Incrémenté à chaque modification, permet aux caches dérivés de rester synchronisés
+        self.version = 0
+
+    def commune_seed(self, commune):
+        """Graine propre à une commune, pour pouvoir la régénérer seule"""
+        if self.seed is None:
+            return None
+        # Position dans le registre global : même série quel que soit le sous-ensemble construit
+        return self.seed + COMMUNES.index(commune_entry(commune))
+
+    def generate_commune(self, commune, quiet=True):
+        """Génère les données d'une commune avec sa propre graine"""
+        analyzer = load_analyzer(commune)
+        analyzer.start_year = self.start_year
+        analyzer.end_year = self.end_year
+        seed = self.commune_seed(commune)
+        if seed is not None:
+            np.random.seed(seed)
+        if quiet:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return analyzer.generate_financial_data()
+        return analyzer.generate_financial_data()
+
+    def build(self, quiet=True):
+        """Génère les 24 communes et remplit le panel"""
+        for commune in self.communes:
+            self.set_commune(commune, self.generate_commune(commune, quiet=quiet))
+        return self
+
+    def set_commune(self, commune, df):
+        """Remplace les données d'une commune dans le panel"""
+        i = self.communes.index(commune)
+        frame = df.set_index('Annee').reindex(self.years)
+        self.values[i] = frame[self.indicators].to_numpy(dtype=float)
+        self.frames[commune] = df
+        self.version += 1
+
+    def indicator(self, name):
+        """Retourne la tranche communes × années d'un indicateur"""
+        return self.values[:, :, self.indicators.index(name)]
+
+    def to_frame(self):
+        """Retourne le panel au format long (une ligne par commune et par année)"""
+        n_communes, n_years, _ = self.values.shape
+        df = pd.DataFrame(self.values.reshape(n_communes * n_years, -1), columns=self.indicators)
+        df.insert(0, 'Annee', np.tile(self.years, n_communes))
+        df.insert(0, 'Commune', np.repeat(self.communes, n_years))
+        return df
+
+
+def build_ensemble(n_runs, seed=0, start_year=2002, end_year=2025, quiet=True):
+    """Génère un ensemble de Monte Carlo : runs × communes × années × indicateurs"""
+    runs = []
+    for run in range(n_runs):
+        # Graines espacées pour que les runs ne partagent aucune commune
+        panel = IslandPanel(seed=seed + run * len(COMMUNES), start_year=start_year, end_year=end_year)
+        runs.append(panel.build(quiet=quiet).values)
+    return np.stack(runs)
+
+
+def commune_ensemble(commune, n_runs, seed=0, start_year=2002, end_year=2025):
+    """Ensemble d'une seule commune, colonnes sectorielles comprises : {colonne: (runs, années)}"""
+    frames = []
+    for run in range(n_runs):
+        # Mêmes graines que build_ensemble : les runs sont cohérents avec l'ensemble insulaire
+        panel = IslandPanel(seed=seed + run * len(COMMUNES), start_year=start_year, end_year=end_year)
+        frames.append(panel.generate_commune(commune_entry(commune)[2]).set_index('Annee').reindex(panel.years))
+    columns = [c for c in frames[0].columns if pd.api.types.is_numeric_dtype(frames[0][c])]
+    return {column: np.stack([frame[column].to_numpy(dtype=float) for frame in frames]) for column in columns}
+
+
+def matches_run(frame, ensemble, run=0):
+    """Vrai si un DataFrame communal est identique au run demandé d'un ensemble de commune_ensemble"""
+    return all(np.allclose(frame[column].to_numpy(dtype=float), values[run], equal_nan=True)
+               for column, values in ensemble.items() if column in frame)
+
+
+def main():
+    """Requête en ligne de commande : un indicateur d'une commune, sans tracé"""
+    parser = argparse.ArgumentParser(description="Valeurs d'un indicateur pour une commune")
+    parser.add_argument('commune')
+    parser.add_argument('--indicator', default='Dette_Totale', choices=INDICATORS)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--start-year', type=int, default=2002)
+    parser.add_argument('--end-year', type=int, default=2025)
+    args = parser.parse_args()
+
+    commune = commune_entry(args.commune)[2]
+    panel = IslandPanel(seed=args.seed, start_year=args.start_year, end_year=args.end_year, communes=[commune])
+    df = panel.generate_commune(commune)
+    print(f"🏛️ {commune} - {args.indicator}")
+    print(df[['Annee', args.indicator]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
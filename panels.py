@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from build import source_digest
+from communes import commune_entry
+from dashboard import PANELS, DashboardTemplate, dashboard_title, plotted_columns
+from headless import enable_headless
+from panel import IslandPanel
+
+# Taille d'un panneau seul : la grille 4×2 reconstitue la figure historique de 20×24 pouces
+PANEL_FIGSIZE = (10, 6)
+TITLE_HEIGHT = 0.5
+
+# Code de rendu des panneaux : le modifier rend toutes les images périmées
+PANEL_SOURCES = ['dashboard.py', 'plotting.py', 'panels.py']
+
+# Modèles propres à chaque processus de travail, réutilisés d'une commune à l'autre
+_templates = {}
+
+
+def render_panel(name, df, path, dpi=100, years=None):
+    """Rend un panneau seul dans une image de taille fixe (exécuté dans un processus de travail)"""
+    enable_headless()
+    years = tuple(df['Annee'] if years is None else years)
+    start = time.perf_counter()
+    if (name, years) not in _templates:
+        _templates[name, years] = DashboardTemplate(np.array(years), panels=[name], figsize=PANEL_FIGSIZE)
+    template = _templates[name, years]
+    template.update(df)
+    # Taille fixe (pas de bbox serrée) pour pouvoir assembler les images
+    template.save(path, dpi=dpi, bbox_inches=None)
+    return name, path, time.perf_counter() - start
+
+
+def panel_key(name, df, dpi, code_digest):
+    """Empreinte des données d'un panneau : ses colonnes tracées sur les années où elles ont une valeur"""
+    columns = plotted_columns(df, [name])
+    data = df[columns]
+    # Une année sans aucune valeur pour ce panneau ne change pas l'image gardée
+    data = data[data.drop(columns='Annee').notna().any(axis=1)]
+    digest = hashlib.sha256(json.dumps([columns, dpi, code_digest]).encode())
+    digest.update(data.to_numpy(dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def render_title(title, path, dpi=100):
+    """Rend le bandeau de titre du tableau de bord assemblé"""
+    enable_headless()
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    fig = plt.figure(figsize=(2 * PANEL_FIGSIZE[0], TITLE_HEIGHT))
+    fig.text(0.5, 0.5, title, ha='center', va='center', fontsize=16, fontweight='bold')
+    fig.savefig(path, dpi=dpi, facecolor='white')
+    plt.close(fig)
+    return 'title', path, time.perf_counter() - start
+
+
+def composite(title_path, panel_paths, output_path):
+    """Assemble le bandeau et les panneaux en grille 4×2 à partir des images"""
+    import matplotlib.image as mpimg
+
+    tiles = [mpimg.imread(path) for path in panel_paths]
+    if len(tiles) % 2:
+        tiles.append(np.ones_like(tiles[0]))
+    rows = [np.hstack(tiles[i:i + 2]) for i in range(0, len(tiles), 2)]
+    banner = mpimg.imread(title_path)
+    mpimg.imsave(output_path, np.vstack([banner[:, :rows[0].shape[1]]] + rows))
+
+
+class PanelRenderer:
+    """Rend les panneaux d'un tableau de bord en parallèle, un processus par panneau"""
+
+    def __init__(self, output_dir='.', workers=None, dpi=100):
+        self.output_dir = output_dir
+        self.dpi = dpi
+        self.code_digest = source_digest(PANEL_SOURCES)
+        # spawn : processus propres, sans hériter de l'état de matplotlib du parent
+        self.executor = ProcessPoolExecutor(workers or min(len(PANELS), os.cpu_count() or 1),
+                                            mp_context=multiprocessing.get_context('spawn'))
+
+    def panel_path(self, commune, name):
+        """Chemin de l'image d'un panneau"""
+        return os.path.join(self.output_dir, f'{commune_entry(commune)[3]}_{name}.png')
+
+    def dashboard_path(self, commune):
+        """Chemin du tableau de bord assemblé"""
+        return os.path.join(self.output_dir, f'{commune_entry(commune)[3]}_financial_analysis.png')
+
+    def title_path(self, commune):
+        """Chemin temporaire du bandeau de titre"""
+        return os.path.join(self.output_dir, f'{commune_entry(commune)[3]}_title.png')
+
+    def manifest_path(self, commune):
+        """Empreintes des images de panneaux d'une commune"""
+        return os.path.join(self.output_dir, f'{commune_entry(commune)[3]}_panels.json')
+
+    def _keys(self, commune):
+        """Empreintes enregistrées au dernier rendu (vide si aucun)"""
+        try:
+            with open(self.manifest_path(commune), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def stale_panels(self, commune, df, panels=None):
+        """Panneaux dont l'image manque ou dont les données tracées ont changé depuis le dernier rendu"""
+        keys = self._keys(commune)
+        return [name for name in panels or PANELS
+                if not os.path.exists(self.panel_path(commune, name))
+                or keys.get(name) != panel_key(name, df, self.dpi, self.code_digest)]
+
+    def _publish(self, commune, panels):
+        """Assemble le bandeau et les images de panneaux présentes sur disque, puis supprime le bandeau"""
+        composite(self.title_path(commune), [self.panel_path(commune, name) for name in panels],
+                  self.dashboard_path(commune))
+        os.remove(self.title_path(commune))
+
+    def render(self, commune, df, title, panels=None, assemble=True):
+        """Rend chaque panneau séparément puis assemble facultativement le tableau de bord"""
+        panels = panels or PANELS
+        futures = [self.executor.submit(render_panel, name, df, self.panel_path(commune, name), self.dpi)
+                   for name in panels]
+        if assemble:
+            futures.append(self.executor.submit(render_title, title, self.title_path(commune), self.dpi))
+        timings = {name: seconds for name, _, seconds in (f.result() for f in futures)}
+        keys = self._keys(commune)
+        keys.update({name: panel_key(name, df, self.dpi, self.code_digest) for name in panels})
+        with open(f'{self.manifest_path(commune)}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(keys, f, indent=2)
+        os.replace(f'{self.manifest_path(commune)}.tmp', self.manifest_path(commune))
+        if assemble:
+            self._publish(commune, panels)
+        return timings
+
+    def assemble(self, commune, title, panels=None):
+        """Tableau de bord reconstruit avec un nouveau titre, sans rendre à nouveau les panneaux"""
+        _, _, seconds = self.executor.submit(render_title, title, self.title_path(commune), self.dpi).result()
+        self._publish(commune, panels or PANELS)
+        return seconds
+
+    def close(self):
+        """Arrête les processus de travail"""
+        self.executor.shutdown()
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Rendu parallèle des panneaux des tableaux de bord")
+    parser.add_argument('communes', nargs='*', help="Communes à rendre (toutes par défaut)")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-composite', action='store_true', help="Garde seulement les images par panneau")
+    args = parser.parse_args()
+
+    enable_headless()
+    print("🧩 RENDU PARALLÈLE DES PANNEAUX")
+    print("=" * 60)
+
+    communes = [commune_entry(c)[2] for c in args.communes] or None
+    panel = IslandPanel(seed=args.seed, communes=communes).build()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    renderer = PanelRenderer(args.output_dir, workers=args.workers, dpi=args.dpi)
+    for commune in panel.communes:
+        start = time.perf_counter()
+        timings = renderer.render(commune, panel.frames[commune],
+                                  dashboard_title(commune, panel.start_year, panel.end_year),
+                                  assemble=not args.no_composite)
+        slowest = max(timings, key=timings.get)
+        print(f"✅ {commune}: {time.perf_counter() - start:.2f}s "
+              f"(panneau le plus lent: {slowest} {timings[slowest]:.2f}s)")
+    renderer.close()
+
+
+if __name__ == "__main__":
+    main()
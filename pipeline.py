@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from communes import COMMUNES, commune_entry, load_analyzer
+from headless import enable_headless
+from panel import IslandPanel
+
+# Sentinelle de fin de flux entre deux étages
+DONE = object()
+
+
+def render_commune(commune, df, output_dir, start_year, end_year):
+    """Trace le tableau de bord d'une commune dans un processus de travail"""
+    enable_headless()
+    analyzer = load_analyzer(commune)
+    analyzer.start_year = start_year
+    analyzer.end_year = end_year
+    # Les insights sont produits par l'étage rapport, pas pendant le rendu
+    analyzer._generate_financial_insights = lambda df: None
+    cwd = os.getcwd()
+    os.chdir(output_dir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer.create_financial_analysis(df, show=False)
+    finally:
+        os.chdir(cwd)
+    return commune
+
+
+class StagePipeline:
+    """Ordonnanceur asyncio : génération → écriture → rendu → rapport, étages en recouvrement"""
+
+    def __init__(self, output_dir='.', seed=None, start_year=2002, end_year=2025,
+                 render_workers=None, io_workers=4, queue_size=2):
+        self.output_dir = output_dir
+        self.panel = IslandPanel(seed=seed, start_year=start_year, end_year=end_year)
+        self.render_workers = render_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.io_workers = io_workers
+        self.queue_size = queue_size
+        self.timings = {'generate': 0.0, 'write': 0.0, 'render': 0.0, 'report': 0.0}
+
+    def _path(self, commune, suffix):
+        """Chemin d'une sortie de commune"""
+        return os.path.join(self.output_dir, f'{commune_entry(commune)[3]}{suffix}')
+
+    def _write_csv(self, commune, df):
+        """Écrit le CSV d'une commune (étage E/S)"""
+        period = f'_financial_data_{self.panel.start_year}_{self.panel.end_year}.csv'
+        df.to_csv(self._path(commune, period), index=False)
+
+    def _write_report(self, commune, df):
+        """Écrit le rapport d'insights d'une commune (étage E/S)"""
+        analyzer = load_analyzer(commune)
+        analyzer.start_year = self.panel.start_year
+        analyzer.end_year = self.panel.end_year
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            analyzer._generate_financial_insights(df)
+        with open(self._path(commune, '_financial_insights.txt'), 'w', encoding='utf-8') as f:
+            f.write(buffer.getvalue())
+
+    async def _timed(self, stage, executor, func, *args):
+        """Exécute une tâche d'étage dans un exécuteur en cumulant son temps"""
+        start = time.perf_counter()
+        result = await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        self.timings[stage] += time.perf_counter() - start
+        return result
+
+    async def _generate(self, communes, out_queue, executor):
+        """Étage 1 : génération séquentielle (le générateur aléatoire global n'est pas partagé)"""
+        for commune in communes:
+            df = await self._timed('generate', executor, self.panel.generate_commune, commune)
+            await out_queue.put((commune, df))
+        await out_queue.put(DONE)
+
+    async def _write(self, in_queue, out_queue, executor):
+        """Étage 2 : écriture CSV, le rendu peut démarrer sans attendre le disque"""
+        pending = []
+        while (item := await in_queue.get()) is not DONE:
+            commune, df = item
+            pending.append(asyncio.create_task(self._timed('write', executor, self._write_csv, commune, df)))
+            await out_queue.put(item)
+        await asyncio.gather(*pending)
+        await out_queue.put(DONE)
+
+    async def _render(self, in_queue, out_queue, executor):
+        """Étage 3 : rendu en processus, au plus render_workers figures en cours"""
+        slots = asyncio.Semaphore(self.render_workers)
+
+        async def render(commune, df):
+            try:
+                await self._timed('render', executor, render_commune, commune, df, self.output_dir,
+                                  self.panel.start_year, self.panel.end_year)
+            finally:
+                slots.release()
+            await out_queue.put((commune, df))
+
+        pending = []
+        while (item := await in_queue.get()) is not DONE:
+            # On ne consomme la file amont que lorsqu'un processus de rendu est libre
+            await slots.acquire()
+            pending.append(asyncio.create_task(render(*item)))
+        await asyncio.gather(*pending)
+        await out_queue.put(DONE)
+
+    async def _report(self, in_queue, executor):
+        """Étage 4 : rapports d'insights"""
+        done = []
+        while (item := await in_queue.get()) is not DONE:
+            commune, df = item
+            await self._timed('report', executor, self._write_report, commune, df)
+            print(f"✅ {commune}")
+            done.append(commune)
+        return done
+
+    async def run_async(self, communes=None):
+        """Lance les quatre étages reliés par des files bornées"""
+        communes = communes or self.panel.communes
+        # Files bornées : un étage lent ralentit l'amont au lieu d'accumuler des données
+        written = asyncio.Queue(self.queue_size)
+        to_render = asyncio.Queue(self.queue_size)
+        rendered = asyncio.Queue(self.queue_size)
+        # spawn plutôt que fork : un fork pendant qu'un thread importe un script bloquerait le fils
+        spawn = multiprocessing.get_context('spawn')
+        with ThreadPoolExecutor(1) as generator, ThreadPoolExecutor(self.io_workers) as io_pool, \
+                ProcessPoolExecutor(self.render_workers, mp_context=spawn) as render_pool:
+            results = await asyncio.gather(
+                self._generate(communes, written, generator),
+                self._write(written, to_render, io_pool),
+                self._render(to_render, rendered, render_pool),
+                self._report(rendered, io_pool),
+            )
+        return results[-1]
+
+    def run(self, communes=None):
+        """Point d'entrée synchrone"""
+        return asyncio.run(self.run_async(communes))
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Traitement en pipeline des 24 communes")
+    parser.add_argument('communes', nargs='*', help="Communes à traiter (toutes par défaut)")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None, help="Processus de rendu")
+    parser.add_argument('--queue-size', type=int, default=2)
+    args = parser.parse_args()
+
+    print("⚙️ TRAITEMENT EN PIPELINE DES COMPTES COMMUNAUX")
+    print("=" * 60)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    pipeline = StagePipeline(args.output_dir, seed=args.seed, render_workers=args.workers,
+                             queue_size=args.queue_size)
+    start = time.perf_counter()
+    done = pipeline.run([commune_entry(c)[2] for c in args.communes] or None)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ {len(done)} commune(s) traitée(s) sur {len(args.communes) or len(COMMUNES)} en {elapsed:.2f}s")
+    print("⏱️ Temps cumulé par étage:")
+    for stage, seconds in pipeline.timings.items():
+        print(f"• {stage}: {seconds:.2f}s")
+    print(f"📈 Somme des étages: {sum(pipeline.timings.values()):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+def bar_vertices(x, bottom, top, width=0.8):
+    """Sommets (n, 4, 2) de n barres centrées sur x, de bottom à top"""
+    x = np.asarray(x, dtype=float)
+    left = x - width / 2
+    right = x + width / 2
+    return np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                     np.column_stack([right, top]), np.column_stack([right, bottom])], axis=1)
+
+
+def stack_bounds(values):
+    """Bas et haut de chaque catégorie empilée, calculés d'un coup par somme cumulée"""
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    tops = np.cumsum(values, axis=0)
+    return tops - values, tops
+
+
+def stacked_bars(ax, x, values, labels, colors, width=0.8):
+    """Barres empilées : une PolyCollection par catégorie au lieu d'un rectangle par barre"""
+    from matplotlib.collections import PolyCollection
+
+    bottoms, tops = stack_bounds(values)
+    collections = []
+    for bottom, top, label, color in zip(bottoms, tops, labels, colors):
+        collection = PolyCollection(bar_vertices(x, bottom, top, width), facecolors=color,
+                                    edgecolors='none', label=label)
+        # Comme ax.bar : l'axe des ordonnées démarre à zéro, sans marge en dessous
+        collection.sticky_edges.y.append(0)
+        ax.add_collection(collection)
+        collections.append(collection)
+    update_stack_limits(ax, x, tops, width)
+    ax.autoscale_view()
+    return collections
+
+
+def set_stacked_bars(collections, x, values, width=0.8):
+    """Remplace les hauteurs d'une pile existante ; renvoie les sommets de chaque catégorie"""
+    bottoms, tops = stack_bounds(values)
+    for collection, bottom, top in zip(collections, bottoms, tops):
+        collection.set_verts(bar_vertices(x, bottom, top, width))
+    return tops
+
+
+def update_stack_limits(ax, x, tops, width=0.8):
+    """Étend les limites de données de l'axe à la pile (relim ignore les collections avant matplotlib 3.10)"""
+    x = np.asarray(x, dtype=float)
+    tops = np.vstack([np.zeros(len(x))] + list(tops))
+    ax.update_datalim(np.column_stack([np.r_[x - width / 2, x + width / 2],
+                                       np.r_[tops.max(axis=0), tops.min(axis=0)]]))
+
+
+# Centiles des éventails : bandes 5-95 et 25-75 autour de la médiane
+QUANTILES = (5, 25, 50, 75, 95)
+
+
+def quantile_bands(runs):
+    """Centiles par colonne d'un ensemble {colonne: (runs, années)} -> {colonne: (5, années)}"""
+    return {column: np.nanpercentile(values, QUANTILES, axis=0) for column, values in runs.items()}
+
+
+def band_vertices(x, low, high):
+    """Polygone (1, 2n, 2) d'une bande entre low et high, comme fill_between"""
+    x = np.asarray(x, dtype=float)
+    return np.concatenate([np.column_stack([x, low]), np.column_stack([x[::-1], high[::-1]])])[None]
+
+
+def fan_chart(ax, x, bands, color, alphas=(0.15, 0.3)):
+    """Éventail de centiles : deux PolyCollection quel que soit le nombre de runs"""
+    from matplotlib.collections import PolyCollection
+
+    collections = []
+    for alpha in alphas:
+        collection = PolyCollection(np.zeros((1, 2 * len(x), 2)), facecolors=color, edgecolors='none',
+                                    alpha=alpha)
+        ax.add_collection(collection, autolim=False)
+        collections.append(collection)
+    if bands is not None:
+        set_fan_chart(collections, x, bands)
+        update_band_limits(ax, x, bands)
+    return collections
+
+
+def set_fan_chart(collections, x, bands):
+    """Met à jour un éventail à partir d'un tableau (5, années) de centiles"""
+    outer, inner = collections
+    outer.set_verts(band_vertices(x, bands[0], bands[4]))
+    inner.set_verts(band_vertices(x, bands[1], bands[3]))
+
+
+def update_band_limits(ax, x, bands):
+    """Étend les limites de données de l'axe à la bande extérieure"""
+    x = np.asarray(x, dtype=float)
+    ax.update_datalim(np.column_stack([np.r_[x, x], np.r_[bands[0], bands[4]]]))
@@ -0,0 +1,136 @@
+import argparse
+import os
+import time
+from communes import commune_entry
+from dashboard import PANELS, DashboardTemplate, dashboard_title
+from encode import render_rgba, write_image
+from headless import enable_headless
+from panel import IslandPanel
+from render_cache import RenderCache
+
+# Profils de rendu : vignette rapide, web et impression (l'ancien rendu à 300 dpi)
+PROFILES = {
+    'preview': {'dpi': 50, 'figsize': (10, 8), 'format': 'png', 'suffix': '_preview',
+                'panels': ['revenue_expenses', 'debt', 'demography', 'sectorial_investments']},
+    'web': {'dpi': 100, 'figsize': (20, 24), 'format': 'png', 'suffix': '_web', 'panels': PANELS},
+    'print': {'dpi': 300, 'figsize': (20, 24), 'format': 'png', 'suffix': '', 'panels': PANELS},
+}
+
+
+def profile_path(output_dir, commune, profile):
+    """Chemin de sortie d'une commune pour un profil"""
+    settings = PROFILES[profile]
+    name = f"{commune_entry(commune)[3]}_financial_analysis{settings['suffix']}.{settings['format']}"
+    return os.path.join(output_dir, name)
+
+
+class ProfileRenderer:
+    """Rend une commune dans plusieurs profils à partir des mêmes données"""
+
+    def __init__(self, years, output_dir='.', cache=None):
+        self.years = years
+        self.output_dir = output_dir
+        # RenderCache facultatif : une image inchangée est copiée sans construire de figure
+        self.cache = cache
+        self.templates = {}
+        self.stats = []
+
+    def template(self, profile):
+        """Modèle de tableau de bord d'un profil, construit à la première demande"""
+        if profile not in self.templates:
+            settings = PROFILES[profile]
+            self.templates[profile] = DashboardTemplate(self.years, panels=settings['panels'],
+                                                        figsize=settings['figsize'])
+        return self.templates[profile]
+
+    def output_path(self, commune, profile):
+        """Chemin de sortie d'une commune pour un profil"""
+        return profile_path(self.output_dir, commune, profile)
+
+    def render(self, commune, df, title, profiles=('preview', 'web', 'print')):
+        """Rend une commune dans chaque profil demandé et mesure encodage et taille"""
+        results = []
+        for profile in profiles:
+            settings = PROFILES[profile]
+            path = self.output_path(commune, profile)
+            draw_seconds = 0.0
+            start = time.perf_counter()
+            key = self.cache.key(df, profile, settings, title) if self.cache else None
+            cached = key is not None and self.cache.fetch(key, settings['format'], path)
+            if not cached:
+                template = self.template(profile)
+                template.update(df, title)
+                # Tracé d'abord, puis encodage seul : le chronomètre d'encodage ne compte que l'écriture
+                draw_start = time.perf_counter()
+                rgba = render_rgba(template.fig, settings['dpi'])
+                draw_seconds = time.perf_counter() - draw_start
+                start = time.perf_counter()
+                write_image(rgba, path, settings['format'])
+                if key is not None:
+                    self.cache.store(key, settings['format'], path)
+            results.append({'commune': commune, 'profile': profile, 'path': path, 'cached': cached,
+                            'draw_seconds': draw_seconds, 'seconds': time.perf_counter() - start,
+                            'bytes': os.path.getsize(path)})
+        self.stats.extend(results)
+        return results
+
+    def summary(self):
+        """Temps de tracé, temps d'encodage et taille totaux par profil"""
+        totals = {}
+        for stat in self.stats:
+            total = totals.setdefault(stat['profile'], {'count': 0, 'draw_seconds': 0.0, 'seconds': 0.0,
+                                                        'bytes': 0})
+            total['count'] += 1
+            total['draw_seconds'] += stat['draw_seconds']
+            total['seconds'] += stat['seconds']
+            total['bytes'] += stat['bytes']
+        return totals
+
+    def close(self):
+        """Libère les figures de tous les profils"""
+        for template in self.templates.values():
+            template.close()
+        self.templates = {}
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Rendu des tableaux de bord selon plusieurs profils")
+    parser.add_argument('communes', nargs='*', help="Communes à rendre (toutes par défaut)")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--cache-dir', default=None, help="Dossier du cache de rendu (désactivé par défaut)")
+    parser.add_argument('--profiles', default='preview,web,print',
+                        help=f"Profils séparés par des virgules parmi {', '.join(PROFILES)}")
+    args = parser.parse_args()
+
+    enable_headless()
+    print("🖼️ RENDU MULTI-PROFILS DES TABLEAUX DE BORD")
+    print("=" * 60)
+
+    profiles = args.profiles.split(',')
+    communes = [commune_entry(c)[2] for c in args.communes] or None
+    panel = IslandPanel(seed=args.seed, communes=communes).build()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    cache = RenderCache(args.cache_dir) if args.cache_dir else None
+    renderer = ProfileRenderer(panel.years, args.output_dir, cache=cache)
+    for commune in panel.communes:
+        title = dashboard_title(commune, panel.start_year, panel.end_year)
+        renderer.render(commune, panel.frames[commune], title, profiles)
+        print(f"✅ {commune}")
+    renderer.close()
+
+    print("\n📊 Encodage par profil:")
+    for profile, total in renderer.summary().items():
+        print(f"• {profile}: {total['count']} image(s), {total['seconds']:.2f}s "
+              f"(tracé {total['draw_seconds']:.2f}s), "
+              f"{total['bytes'] / 1e6:.2f} Mo (moyenne {total['bytes'] / total['count'] / 1e3:.0f} ko)")
+    if cache:
+        stats = cache.stats()
+        print(f"🗃️ Cache: {stats['hits']} succès, {stats['misses']} échecs "
+              f"({stats['hit_rate'] * 100:.0f}%), {stats['bytes_served'] / 1e6:.2f} Mo servis")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import shutil
+from build import source_digest
+from dashboard import STYLE, plotted_columns
+
+# Le code de rendu fait partie de l'empreinte : le modifier invalide le cache
+RENDER_SOURCES = ['dashboard.py', 'plotting.py', 'render.py', 'encode.py']
+
+
+class RenderCache:
+    """Cache d'images indexé par l'empreinte des données tracées, du profil et du style"""
+
+    def __init__(self, cache_dir='.render_cache'):
+        self.cache_dir = cache_dir
+        self.code_digest = source_digest(RENDER_SOURCES)
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, df, profile, settings, title):
+        """Empreinte des colonnes tracées, du profil de rendu et du style"""
+        digest = hashlib.sha256()
+        columns = plotted_columns(df, settings['panels'])
+        digest.update(json.dumps(columns).encode())
+        for column in columns:
+            digest.update(df[column].to_numpy(dtype=float).tobytes())
+        style = {'profile': profile, 'settings': settings, 'style': STYLE, 'title': title,
+                 'code': self.code_digest}
+        digest.update(json.dumps(style, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, key, extension):
+        """Emplacement d'une entrée du cache"""
+        return os.path.join(self.cache_dir, key[:2], f'{key}.{extension}')
+
+    def fetch(self, key, extension, destination):
+        """Copie l'image en cache vers la destination ; False si absente"""
+        cached = self._path(key, extension)
+        if not os.path.exists(cached):
+            self.misses += 1
+            return False
+        if os.path.abspath(cached) != os.path.abspath(destination):
+            shutil.copyfile(cached, destination)
+        self.hits += 1
+        self.bytes_served += os.path.getsize(cached)
+        return True
+
+    def store(self, key, extension, source):
+        """Enregistre une image fraîchement rendue (écriture atomique)"""
+        cached = self._path(key, extension)
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        tmp_path = f'{cached}.{os.getpid()}.tmp'
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, cached)
+
+    def stats(self):
+        """Statistiques d'utilisation du cache"""
+        requests = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'bytes_served': self.bytes_served}
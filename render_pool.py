@@ -0,0 +1,164 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+import numpy as np
+from dashboard import DashboardTemplate, dashboard_title
+from headless import enable_headless
+from panel import IslandPanel
+from render import PROFILES, profile_path
+
+# Modèles préconstruits du processus de travail, un par profil
+_worker_templates = {}
+
+
+def _warm_worker(years, profiles, ready):
+    """Initialisation d'un processus : matplotlib, style, polices et modèles prêts avant la première requête"""
+    enable_headless()
+    for profile in profiles:
+        settings = PROFILES[profile]
+        template = DashboardTemplate(years, panels=settings['panels'], figsize=settings['figsize'])
+        # Un premier tracé charge les polices et remplit les caches de texte
+        template.fig.canvas.draw()
+        _worker_templates[profile] = template
+    ready.put(os.getpid())
+
+
+def _render_request(profile, df, title, path):
+    """Rendu d'une requête dans un processus préchauffé : seulement le tracé et l'encodage"""
+    start = time.perf_counter()
+    template = _worker_templates[profile]
+    template.update(df, title)
+    template.save(path, dpi=PROFILES[profile]['dpi'], format=PROFILES[profile]['format'])
+    return time.perf_counter() - start
+
+
+class RenderRequest:
+    """Requête soumise au pool : get() renvoie le chemin produit ou relève l'erreur du processus de travail"""
+
+    def __init__(self, result, path):
+        self.result = result
+        self.path = path
+
+    def ready(self):
+        """Vrai quand la requête est terminée (réussie ou non)"""
+        return self.result.ready()
+
+    def get(self, timeout=None):
+        """Attend la fin du rendu ; relève l'exception du processus de travail en cas d'échec"""
+        self.result.get(timeout)
+        return self.path
+
+
+class RenderPool:
+    """Pool de processus de rendu préchauffés pour les tableaux de bord à la demande"""
+
+    def __init__(self, years, output_dir='.', workers=None, profiles=('web',)):
+        self.output_dir = output_dir
+        self.profiles = list(profiles)
+        self.workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context('spawn')
+        self.ready = context.Queue()
+        start = time.perf_counter()
+        # multiprocessing.Pool démarre tous ses processus immédiatement, contrairement à ProcessPoolExecutor
+        self.pool = context.Pool(self.workers, initializer=_warm_worker,
+                                 initargs=(np.asarray(years), self.profiles, self.ready))
+        self.started = start
+        self.warm_seconds = None
+        self.latencies = []
+        self.draw_seconds = []
+        self.failures = []
+
+    def wait_ready(self, timeout=None):
+        """Attend que tous les processus soient préchauffés ; renvoie la durée du préchauffage"""
+        for _ in range(self.workers):
+            self.ready.get(timeout=timeout)
+        self.warm_seconds = time.perf_counter() - self.started
+        return self.warm_seconds
+
+    def submit(self, commune, df, title, profile=None):
+        """Soumet une requête ; renvoie une RenderRequest dont get() donne le chemin produit"""
+        profile = profile or self.profiles[0]
+        # Chemins de sortie identiques à ceux du rendu séquentiel par profils
+        path = profile_path(self.output_dir, commune, profile)
+        start = time.perf_counter()
+
+        def done(draw_seconds):
+            self.latencies.append(time.perf_counter() - start)
+            self.draw_seconds.append(draw_seconds)
+
+        def failed(exc):
+            # L'exception est aussi relevée par RenderRequest.get()
+            self.failures.append((commune, profile, exc))
+
+        result = self.pool.apply_async(_render_request, (profile, df, title, path), callback=done,
+                                       error_callback=failed)
+        return RenderRequest(result, path)
+
+    def render(self, commune, df, title, profile=None):
+        """Requête synchrone : attend l'image et renvoie (chemin, latence)"""
+        profile = profile or self.profiles[0]
+        path = profile_path(self.output_dir, commune, profile)
+        start = time.perf_counter()
+        try:
+            draw_seconds = self.pool.apply(_render_request, (profile, df, title, path))
+        except Exception as exc:
+            self.failures.append((commune, profile, exc))
+            raise
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        self.draw_seconds.append(draw_seconds)
+        return path, latency
+
+    def latency_summary(self):
+        """Latences p50/p95 des requêtes (s), de bout en bout et côté processus de travail"""
+        if not self.latencies:
+            return {'count': 0, 'failed': len(self.failures)}
+        return {'count': len(self.latencies), 'failed': len(self.failures),
+                'p50': float(np.percentile(self.latencies, 50)), 'p95': float(np.percentile(self.latencies, 95)),
+                'draw_p50': float(np.percentile(self.draw_seconds, 50)),
+                'draw_p95': float(np.percentile(self.draw_seconds, 95))}
+
+    def close(self):
+        """Attend les requêtes en cours puis arrête les processus"""
+        self.pool.close()
+        self.pool.join()
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Rendu à la demande par un pool de processus préchauffés")
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--profile', choices=list(PROFILES), default='web')
+    parser.add_argument('--requests', type=int, default=24, help="Nombre de requêtes simulées")
+    args = parser.parse_args()
+
+    enable_headless()
+    print("🔥 POOL DE RENDU PRÉCHAUFFÉ")
+    print("=" * 60)
+
+    panel = IslandPanel(seed=args.seed).build()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    pool = RenderPool(panel.years, args.output_dir, workers=args.workers, profiles=[args.profile])
+    print(f"🧱 {pool.workers} processus préchauffés en {pool.wait_ready():.2f}s")
+
+    rng = random.Random(args.seed)
+    for _ in range(args.requests):
+        commune = rng.choice(panel.communes)
+        path, latency = pool.render(commune, panel.frames[commune],
+                                    dashboard_title(commune, panel.start_year, panel.end_year))
+        print(f"✅ {commune}: {path} ({latency * 1000:.0f} ms)")
+    pool.close()
+
+    summary = pool.latency_summary()
+    print(f"\n⏱️ {summary['count']} requêtes - latence p50 {summary['p50'] * 1000:.0f} ms, "
+          f"p95 {summary['p95'] * 1000:.0f} ms (tracé + encodage p50 {summary['draw_p50'] * 1000:.0f} ms, "
+          f"p95 {summary['draw_p95'] * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
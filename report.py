@@ -0,0 +1,66 @@
+import argparse
+import os
+import time
+from consolidation import ISLAND, IslandConsolidator
+from dashboard import DashboardTemplate, dashboard_title
+from headless import enable_headless
+from panel import IslandPanel
+
+REPORT_FILE = 'rapport_comptes_communaux_reunion.pdf'
+
+
+class IslandReport:
+    """Rapport PDF multi-pages : île, EPCI puis les 24 communes"""
+
+    def __init__(self, panel):
+        self.panel = panel
+        self.consolidator = IslandConsolidator(panel)
+
+    def pages(self):
+        """Pages du rapport dans l'ordre : (titre de page, données)"""
+        for group in [ISLAND] + self.consolidator.groups[:-1]:
+            yield f'{group} (consolidé)', self.consolidator.to_frame(group)
+        for commune in self.panel.communes:
+            yield commune, self.panel.frames[commune]
+
+    def write(self, path=REPORT_FILE):
+        """Écrit le rapport page par page : chaque page est envoyée sur disque dès son rendu"""
+        import matplotlib
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        # Polices TrueType embarquées (texte recherchable), sous-ensembles partagés par toutes les pages
+        with matplotlib.rc_context({'pdf.fonttype': 42, 'pdf.compression': 9}):
+            template = DashboardTemplate(self.panel.years)
+            count = 0
+            with PdfPages(path, metadata={'Title': 'Comptes communaux de La Réunion',
+                                          'Subject': f'{self.panel.start_year}-{self.panel.end_year}'}) as pdf:
+                for name, df in self.pages():
+                    template.update(df, dashboard_title(name, self.panel.start_year, self.panel.end_year))
+                    pdf.savefig(template.fig)
+                    count += 1
+            template.close()
+        return count
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Rapport PDF de l'île, des EPCI et des communes")
+    parser.add_argument('--output', default=REPORT_FILE)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    enable_headless()
+    print("📄 RAPPORT PDF DES COMPTES COMMUNAUX DE LA RÉUNION")
+    print("=" * 60)
+
+    panel = IslandPanel(seed=args.seed).build()
+    start = time.perf_counter()
+    count = IslandReport(panel).write(args.output)
+
+    print(f"💾 Rapport sauvegardé: {args.output}")
+    print(f"📑 {count} pages en {time.perf_counter() - start:.2f}s, "
+          f"{os.path.getsize(args.output) / 1e6:.2f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import sqlite3
+import time
+import numpy as np
+from communes import COMMUNES, commune_entry
+from panel import INDICATORS, IslandPanel
+
+DATABASE_FILE = 'comptes_communaux.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS communes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    slug TEXT NOT NULL UNIQUE,
+    epci TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS indicators (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+-- Table sans rowid : la clé primaire est l'index, trié pour les lectures indicateur → commune → année
+CREATE TABLE IF NOT EXISTS accounts (
+    indicator_id INTEGER NOT NULL REFERENCES indicators(id),
+    commune_id INTEGER NOT NULL REFERENCES communes(id),
+    year INTEGER NOT NULL,
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id),
+    run INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (indicator_id, commune_id, year, scenario_id, run)
+) WITHOUT ROWID;
+-- Index couvrant (value incluse) pour les lectures par commune, tous indicateurs confondus
+CREATE INDEX IF NOT EXISTS accounts_by_commune
+    ON accounts (commune_id, scenario_id, run, year, indicator_id, value);
+-- Indicateurs dérivés (croissance, moyennes glissantes, rangs), recalculés année par année
+CREATE TABLE IF NOT EXISTS derived_metrics (
+    metric TEXT NOT NULL,
+    indicator_id INTEGER NOT NULL REFERENCES indicators(id),
+    commune_id INTEGER NOT NULL REFERENCES communes(id),
+    year INTEGER NOT NULL,
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id),
+    run INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (metric, indicator_id, commune_id, year, scenario_id, run)
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO accounts (indicator_id, commune_id, year, scenario_id, run, value) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (indicator_id, commune_id, year, scenario_id, run) DO UPDATE SET value = excluded.value
+"""
+
+UPSERT_DERIVED = """
+INSERT INTO derived_metrics (metric, indicator_id, commune_id, year, scenario_id, run, value)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (metric, indicator_id, commune_id, year, scenario_id, run) DO UPDATE SET value = excluded.value
+"""
+
+
+class AccountStore:
+    """Base SQLite normalisée (commune, année, indicateur, scénario, run) avec API NumPy"""
+
+    def __init__(self, path=DATABASE_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        # Identifiants attribués par la base et retrouvés par slug / nom : l'ordre du registre
+        # peut changer sans réaffecter les lignes déjà enregistrées
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO communes (name, slug, epci) VALUES (?, ?, ?) '
+                'ON CONFLICT (slug) DO UPDATE SET name = excluded.name, epci = excluded.epci',
+                [(c[2], c[3], c[4]) for c in COMMUNES])
+            self.connection.executemany('INSERT OR IGNORE INTO indicators (name) VALUES (?)',
+                                        [(name,) for name in INDICATORS])
+        names = {c[3]: c[2] for c in COMMUNES}
+        self.commune_ids = {names[slug]: i for i, slug in self.connection.execute('SELECT id, slug FROM communes')
+                            if slug in names}
+        self.indicator_ids = {name: i for i, name in self.connection.execute('SELECT id, name FROM indicators')}
+        self.scenario_ids = {name: i for i, name in self.connection.execute('SELECT id, name FROM scenarios')}
+
+    def scenario_id(self, scenario):
+        """Identifiant d'un scénario, créé à la première utilisation"""
+        if scenario not in self.scenario_ids:
+            cursor = self.connection.execute('INSERT INTO scenarios (name) VALUES (?)', (scenario,))
+            self.scenario_ids[scenario] = cursor.lastrowid
+        return self.scenario_ids[scenario]
+
+    def _rows(self, values, communes, years, scenario, run, indicators):
+        """Lignes (indicateur, commune, année, scénario, run, valeur) d'un cube, sans les NaN"""
+        values = np.asarray(values, dtype=float)
+        c, y, k = np.meshgrid([self.commune_ids[commune_entry(name)[2]] for name in communes],
+                              np.asarray(years, dtype=int), [self.indicator_ids[name] for name in indicators],
+                              indexing='ij')
+        keep = ~np.isnan(values)
+        count = int(keep.sum())
+        return count, zip(k[keep].tolist(), c[keep].tolist(), y[keep].tolist(),
+                          [self.scenario_id(scenario)] * count, [run] * count, values[keep].tolist())
+
+    def upsert_values(self, values, communes, years, scenario='central', run=0, indicators=None):
+        """Insère ou met à jour un cube communes × années × indicateurs en une seule transaction"""
+        with self.connection:
+            count, rows = self._rows(values, communes, years, scenario, run, indicators or INDICATORS)
+            self.connection.executemany(UPSERT, rows)
+        return count
+
+    def upsert_derived(self, metric, values, communes, years, scenario='central', run=0, indicators=None):
+        """Insère ou met à jour un indicateur dérivé (même forme que upsert_values)"""
+        with self.connection:
+            count, rows = self._rows(values, communes, years, scenario, run, indicators or INDICATORS)
+            self.connection.executemany(UPSERT_DERIVED, ((metric,) + row for row in rows))
+        return count
+
+    def years(self, scenario='central', run=0):
+        """Années présentes pour un scénario et un run"""
+        if scenario not in self.scenario_ids:
+            return []
+        return [year for year, in self.connection.execute(
+            'SELECT DISTINCT year FROM accounts WHERE scenario_id = ? AND run = ? ORDER BY year', (self.scenario_ids[scenario], run))]
+
+    def derived_years(self, scenario='central', run=0):
+        """Années dont les indicateurs dérivés sont enregistrés pour un scénario et un run"""
+        if scenario not in self.scenario_ids:
+            return []
+        return [year for year, in self.connection.execute(
+            'SELECT DISTINCT year FROM derived_metrics WHERE scenario_id = ? AND run = ? ORDER BY year',
+            (self.scenario_ids[scenario], run))]
+
+    def derived(self, metric, indicator, commune, scenario='central', run=0):
+        """Série annuelle d'un indicateur dérivé : (années, valeurs) en tableaux NumPy"""
+        rows = self.connection.execute(
+            'SELECT year, value FROM derived_metrics WHERE metric = ? AND indicator_id = ? AND commune_id = ? '
+            'AND scenario_id = ? AND run = ? ORDER BY year',
+            (metric, self.indicator_ids[indicator], self.commune_ids[commune_entry(commune)[2]],
+             self.scenario_ids[scenario], run)).fetchall()
+        data = np.array(rows, dtype=float).reshape(-1, 2)
+        return data[:, 0].astype(int), data[:, 1]
+
+    def upsert_panel(self, panel, scenario='central', run=0):
+        """Insère ou met à jour tout le panel insulaire"""
+        return self.upsert_values(panel.values, panel.communes, panel.years, scenario, run, panel.indicators)
+
+    def value(self, indicator, commune, year, scenario='central', run=0):
+        """Lecture ponctuelle, servie par la clé primaire"""
+        row = self.connection.execute(
+            'SELECT value FROM accounts WHERE indicator_id = ? AND commune_id = ? AND year = ? '
+            'AND scenario_id = ? AND run = ?',
+            (self.indicator_ids[indicator], self.commune_ids[commune_entry(commune)[2]], year,
+             self.scenario_ids[scenario], run)).fetchone()
+        return None if row is None else row[0]
+
+    def series(self, indicator, commune, scenario='central', run=0):
+        """Série annuelle d'un indicateur : (années, valeurs) en tableaux NumPy"""
+        rows = self.connection.execute(
+            'SELECT year, value FROM accounts WHERE indicator_id = ? AND commune_id = ? '
+            'AND scenario_id = ? AND run = ? ORDER BY year',
+            (self.indicator_ids[indicator], self.commune_ids[commune_entry(commune)[2]],
+             self.scenario_ids[scenario], run)).fetchall()
+        data = np.array(rows, dtype=float).reshape(-1, 2)
+        return data[:, 0].astype(int), data[:, 1]
+
+    def runs(self, indicator, commune, scenario='central'):
+        """Matrice runs × années d'un indicateur pour une commune (NaN si manquant)"""
+        rows = np.array(self.connection.execute(
+            'SELECT run, year, value FROM accounts WHERE indicator_id = ? AND commune_id = ? AND scenario_id = ?',
+            (self.indicator_ids[indicator], self.commune_ids[commune_entry(commune)[2]],
+             self.scenario_ids[scenario])).fetchall(), dtype=float).reshape(-1, 3)
+        years = np.unique(rows[:, 1]).astype(int)
+        matrix = np.full((int(rows[:, 0].max(initial=-1)) + 1, len(years)), np.nan)
+        matrix[rows[:, 0].astype(int), np.searchsorted(years, rows[:, 1])] = rows[:, 2]
+        return years, matrix
+
+    def cube(self, scenario='central', run=0, communes=None, indicators=None, start_year=None, end_year=None):
+        """Cube communes × années × indicateurs d'un run, dans l'ordre demandé (années facultativement bornées)"""
+        communes = [commune_entry(c)[2] for c in communes] if communes else [c[2] for c in COMMUNES]
+        indicators = indicators or INDICATORS
+        query = 'SELECT commune_id, year, indicator_id, value FROM accounts WHERE scenario_id = ? AND run = ?'
+        params = [self.scenario_ids[scenario], run]
+        # Bornes ajoutées seulement si elles sont demandées
+        if start_year is not None:
+            query += ' AND year >= ?'
+            params.append(start_year)
+        if end_year is not None:
+            query += ' AND year <= ?'
+            params.append(end_year)
+        rows = np.array(self.connection.execute(query, params).fetchall(), dtype=float).reshape(-1, 4)
+        years = np.unique(rows[:, 1]).astype(int)
+        # Tables de correspondance identifiant -> position demandée (-1 : non demandé)
+        # (la base peut garder des identifiants absents du registre actuel)
+        commune_pos = np.full(max(*self.commune_ids.values(), int(rows[:, 0].max(initial=0))) + 1, -1)
+        commune_pos[[self.commune_ids[c] for c in communes]] = np.arange(len(communes))
+        indicator_pos = np.full(max(*self.indicator_ids.values(), int(rows[:, 2].max(initial=0))) + 1, -1)
+        indicator_pos[[self.indicator_ids[k] for k in indicators]] = np.arange(len(indicators))
+        ci = commune_pos[rows[:, 0].astype(int)]
+        ki = indicator_pos[rows[:, 2].astype(int)]
+        keep = (ci >= 0) & (ki >= 0)
+        values = np.full((len(communes), len(years), len(indicators)), np.nan)
+        values[ci[keep], np.searchsorted(years, rows[keep, 1]), ki[keep]] = rows[keep, 3]
+        return years, values
+
+    def close(self):
+        """Ferme la connexion"""
+        self.connection.close()
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Base SQLite des comptes communaux")
+    parser.add_argument('--database', default=DATABASE_FILE)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--scenario', default='central')
+    args = parser.parse_args()
+
+    print("🗄️ BASE SQLITE DES COMPTES COMMUNAUX")
+    print("=" * 60)
+
+    panel = IslandPanel(seed=args.seed).build()
+    store = AccountStore(args.database)
+
+    start = time.perf_counter()
+    rows = store.upsert_panel(panel, args.scenario)
+    print(f"✍️ Panel insulaire: {rows} lignes insérées ou mises à jour en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    n_lookups = 1000
+    for _ in range(n_lookups):
+        debt = store.value('Dette_Totale', 'Saint-Paul', 2019, args.scenario)
+    lookup = (time.perf_counter() - start) / n_lookups
+    print(f"🔎 Dette_Totale Saint-Paul 2019: {debt:.2f} M€ ({lookup * 1e6:.0f} µs par lecture)")
+
+    start = time.perf_counter()
+    years, values = store.cube(args.scenario)
+    print(f"🧊 Cube relu: {values.shape} en {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"identique au panel: {np.allclose(values, panel.values, equal_nan=True)}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from communes import COMMUNES
+
+# Modules lourds qui ne doivent être chargés qu'au premier rendu
+HEAVY_MODULES = ['matplotlib', 'seaborn']
+
+# Modules partagés dont l'import seul ne doit pas charger matplotlib
+SHARED_MODULES = ['communes', 'panel', 'consolidation', 'benchmark', 'clustering', 'build', 'pipeline',
+                  'dashboard', 'plotting', 'render', 'render_cache', 'panels', 'report', 'island_views',
+                  'animate', 'encode', 'columnar', 'dataset', 'cube_store', 'sql_store',
+                  'official', 'annual_update', 'compact_csv']
+
+# Objectif de démarrage à froid d'une requête de données (python panel.py <commune>)
+QUERY_TARGET = 1.0
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_cold(args, repeat=5):
+    """Durées (s) de `repeat` exécutions dans des interpréteurs neufs"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable] + args, cwd=REPO_DIR, capture_output=True, text=True)
+        durations.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+    return durations, result.stdout
+
+
+def import_time(module, repeat=5):
+    """Temps d'import à froid d'un module et modules lourds chargés au passage"""
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    durations, stdout = run_cold(['-c', code], repeat)
+    heavy = [m for m in stdout.strip().split(',') if m]
+    return statistics.median(durations), heavy
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Mesure du temps de démarrage à froid")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print("⏱️ TEMPS DE DÉMARRAGE À FROID")
+    print("=" * 60)
+
+    baseline = statistics.median(run_cold(['-c', 'pass'], args.repeat)[0])
+    print(f"Interpréteur seul: {baseline * 1000:.0f} ms")
+    for module in ['numpy', 'pandas', 'matplotlib.pyplot']:
+        print(f"import {module}: {import_time(module, args.repeat)[0] * 1000:.0f} ms")
+
+    failures = []
+    print("\n📦 Modules du projet:")
+    for module in [c[0] for c in COMMUNES] + SHARED_MODULES:
+        seconds, heavy = import_time(module, args.repeat)
+        status = '✅' if not heavy else f"⚠️ charge {', '.join(heavy)}"
+        print(f"• {module}: {seconds * 1000:.0f} ms {status}")
+        if heavy:
+            failures.append(module)
+
+    durations, _ = run_cold(['panel.py', 'Saint-Denis', '--seed', '0'], args.repeat)
+    query = statistics.median(durations)
+    print(f"\n🔎 Requête de données (panel.py): {query * 1000:.0f} ms "
+          f"(objectif {QUERY_TARGET * 1000:.0f} ms) {'✅' if query <= QUERY_TARGET else '⚠️'}")
+
+    if failures or query > QUERY_TARGET:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()